@@ -0,0 +1,113 @@
+"""
+In-memory index of medicines that raise an inventory alert
+/api/inventory/alerts used to OR a stock predicate with an expiry
+predicate, which no single index can serve, so every call scanned and
+sorted the whole medicines table. This index holds just the alerting
+medicines (low stock or inside the expiry window), is kept current by
+the same before/after snapshots that drive the KPI counters, and is
+reloaded when the date changes (the expiry window moves with it) and
+every reconcile_interval seconds. The sorted result is cached between
+changes, so a read costs the same at any catalogue size.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+
+from notifications import EXPIRY_WINDOW_DAYS, LOW_STOCK_BELOW, as_date
+
+
+class AlertIndex:
+    """Alerting medicines by id, ordered on (quantity, exp_date) on demand"""
+
+    def __init__(self, reconcile_interval=60, low_stock_below=LOW_STOCK_BELOW,
+                 expiry_days=EXPIRY_WINDOW_DAYS):
+        self.reconcile_interval = reconcile_interval
+        self.low_stock_below = low_stock_below
+        self.expiry_days = expiry_days
+        self._lock = threading.Lock()
+        self._entries = None   # medicine_id -> (quantity, exp_date, name)
+        self._day = None
+        self._loaded_at = 0.0
+        self._stale = False
+        self._reloading = False
+        self._ordered = None   # cached sort of _entries
+
+    def reset(self):
+        """Forget the index, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._entries = None
+            self._day = None
+            self._ordered = None
+            self._stale = False
+            self._reloading = False
+
+    @property
+    def loaded(self):
+        return self._entries is not None
+
+    def claim_reload(self, today=None):
+        """True for the one caller that should rebuild the index now (every caller before the first load)"""
+        today = today or date.today()
+        with self._lock:
+            if self._entries is None:
+                return True
+            due = (self._stale or self._day != today
+                   or time.monotonic() - self._loaded_at >= self.reconcile_interval)
+            if self._reloading or not due:
+                return False
+            self._reloading = True
+            return True
+
+    def release_reload(self):
+        with self._lock:
+            self._reloading = False
+
+    def window_end(self, today):
+        """Last exp_date inside the expiry window"""
+        return today + timedelta(days=self.expiry_days)
+
+    def load(self, rows, today):
+        """Rebuild from (medicine_id, name, quantity, exp_date) rows already filtered by the alert predicate"""
+        entries = {medicine_id: (quantity, as_date(exp_date), name) for medicine_id, name, quantity, exp_date in rows}
+        with self._lock:
+            self._entries = entries
+            self._day = today
+            self._loaded_at = time.monotonic()
+            self._stale = False
+            self._reloading = False
+            self._ordered = None
+
+    def _alerting(self, quantity, exp_date):
+        return quantity < self.low_stock_below or (exp_date is not None and exp_date <= self.window_end(self._day))
+
+    def apply(self, before, after):
+        """Update from the stock snapshots of a committed change (see app.stock_snapshot)"""
+        with self._lock:
+            if self._entries is None:
+                return
+            if any(not isinstance(key, int) for key in after):
+                # Rows without a known medicine_id (bulk import): rebuild on next read
+                self._stale = True
+                return
+            for medicine_id in before.keys() - after.keys():
+                self._entries.pop(medicine_id, None)
+            for medicine_id, (name, quantity, _, exp_date) in after.items():
+                exp_date = as_date(exp_date)
+                if self._alerting(quantity, exp_date):
+                    self._entries[medicine_id] = (quantity, exp_date, name)
+                else:
+                    self._entries.pop(medicine_id, None)
+            self._ordered = None
+
+    def top(self, limit=10):
+        """The first limit alerts as /api/inventory/alerts returns them"""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._entries.items(),
+                                       key=lambda item: (item[1][0], item[1][1] or date.max, item[0]))
+            first = self._ordered[:limit]
+        return [
+            {'id': medicine_id, 'name': name, 'sku': f'MED-{medicine_id}', 'stock': quantity, 'expiryDate': exp_date}
+            for medicine_id, (quantity, exp_date, name) in first
+        ]
@@ -3,393 +3,936 @@ Medical Storage Management System - Flask Backend
 REST API endpoints for CRUD operations
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import mysql.connector
 from mysql.connector import Error
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from datetime import date, datetime, timedelta, timezone
+import base64
+import hashlib
+import json
 import os
-from config import DB_CONFIG, FLASK_CONFIG
+import time
+from config import (
+    DB_CONFIG, DB_POOL_CONFIG, CACHE_CONFIG, BULK_IMPORT_CONFIG, REPORT_CONFIG,
+    PROFILING_CONFIG, KPI_CONFIG, ALERT_CONFIG, NOTIFICATION_CONFIG, IDEMPOTENCY_CONFIG, FLASK_CONFIG
+)
+from alerts import AlertIndex
+from bulk_import import INSERT_MEDICINE, chunked, import_format, iter_rows, resolve_suppliers, validate_row
+from bulk_update import parse_timestamp, update_batches, validate_update
+from cache import ResponseCache
+from db_pool import ConnectionPool
+from idempotency import IDEMPOTENCY_HEADER, MAX_KEY_LENGTH, IdempotencyKeys, request_fingerprint
+from json_provider import FastJSONProvider, dumps as json_dumps, msgpack, packb
+from kpis import KPIState
+from metrics import RequestMetrics
+from notifications import (
+    OVERFLOW, EventFeed, NotificationHub, Subscriber, inventory_deltas, inventory_events, parse_event_id,
+    sse_message, store_events
+)
+from profiling import QueryProfiler
+from sales_rollup import apply_sale
+from search import SEARCH_MODES, boolean_query, result_limit
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # Encodes date/datetime/Decimal row values directly
 CORS(app)  # Enable CORS for all routes
 
+# Shared MySQL connection pool (connections are opened lazily on first use)
+db_pool = ConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
 
-def get_db_connection():
-    """Establish database connection"""
+# Per-request SQL statement/time accounting, reported in Server-Timing
+query_profiler = QueryProfiler(**PROFILING_CONFIG)
+query_profiler.init_app(app)
+
+# Request counts, latency and errors per route, exposed at /metrics
+request_metrics = RequestMetrics()
+request_metrics.init_app(app)
+
+# Cache for polled list endpoints, invalidated by the routes that write them
+response_cache = ResponseCache(CACHE_CONFIG['max_entries'])
+CACHE_TTL = CACHE_CONFIG['ttl']
+
+# Live KPI deltas and stock alerts for /ws/notifications: stored after commits,
+# then read back by every process's feed and fanned out to its clients
+notification_hub = NotificationHub(history=NOTIFICATION_CONFIG['history'])
+notification_feed = EventFeed(notification_hub, poll_interval=NOTIFICATION_CONFIG['poll_interval'],
+                              retention=NOTIFICATION_CONFIG['retention'])
+
+# /api/kpis figures, kept current by the same deltas
+kpi_state = KPIState(**KPI_CONFIG)
+
+# Alerting medicines for /api/inventory/alerts, kept current the same way
+alert_index = AlertIndex(**ALERT_CONFIG)
+
+# Idempotency-Key reservations and stored responses for POST /api/sales
+idempotency_keys = IdempotencyKeys(**IDEMPOTENCY_CONFIG)
+
+# Threads that run independent report queries concurrently
+def make_report_executor():
+    return ThreadPoolExecutor(max_workers=max(1, REPORT_CONFIG['fanout_workers']),
+                              thread_name_prefix='report')
+
+
+report_executor = make_report_executor()
+
+
+def init_worker():
+    """Per-process setup for a worker forked from a preloaded app.
+
+    Pooled sockets and executor threads do not survive a fork, so each
+    worker starts with an empty pool, cache, metrics, notification hub
+    and feed, KPI counters, alert index and report thread pool.
+    """
+    global report_executor
+    db_pool.reset()
+    response_cache.clear()
+    request_metrics.reset()
+    notification_hub.reset()
+    notification_feed.reset()
+    kpi_state.reset()
+    alert_index.reset()
+    report_executor = make_report_executor()
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with-block.
+
+    Yields None if no connection could be obtained. The connection is
+    always handed back to the pool (with its transaction rolled back if
+    it was not committed), whichever way the block exits.
+    """
+    started = time.perf_counter()
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        connection = db_pool.acquire()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
-        return None
+        yield None
+        return
+    finally:
+        query_profiler.record_acquire(time.perf_counter() - started)
+
+    profiled = query_profiler.wrap(connection)
+    try:
+        yield profiled
+    finally:
+        if profiled is not connection:
+            profiled.finish()
+        db_pool.release(connection)
+
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row into an opaque cursor"""
+    raw = json.dumps(list(values), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
 
 
-def serialize_date(date_obj):
-    """Convert date objects to string format"""
-    if date_obj is None:
+def decode_cursor(token, size):
+    """Decode a cursor produced by encode_cursor; None if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
         return None
-    if isinstance(date_obj, datetime):
-        return date_obj.strftime('%Y-%m-%d')
-    if isinstance(date_obj, str):
-        return date_obj
-    return str(date_obj)
+    return values
+
+
+def keyset_before(columns, values):
+    """WHERE clause and params for rows sorting before values on columns (all DESC).
 
+    Spelled out as a < x OR (a = x AND (b < y OR ...)) rather than the
+    row constructor (a, b) < (x, y), which MySQL does not turn into an
+    index range, so deep pages would still walk the index from the top.
+    """
+    column, rest = columns[0], columns[1:]
+    if not rest:
+        return f"{column} < %s", [values[0]]
+    inner_sql, inner_params = keyset_before(rest, values[1:])
+    return f"({column} < %s OR ({column} = %s AND {inner_sql}))", [values[0], values[0], *inner_params]
 
-def serialize_datetime(datetime_obj):
-    """Convert datetime objects to string format"""
-    if datetime_obj is None:
+
+def count_rows(cursor, from_sql, params, mode):
+    """Total for a listing: exact COUNT(*), optimizer estimate, or None"""
+    if mode == 'none':
         return None
-    if isinstance(datetime_obj, datetime):
-        return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
-    return str(datetime_obj)
+    if mode == 'estimate':
+        # The optimizer's row estimate comes from index statistics and
+        # costs the same no matter how many rows actually match
+        cursor.execute(f"EXPLAIN SELECT 1 {from_sql}", params)
+        plan = cursor.fetchall()
+        if not plan:
+            return 0
+        first = plan[0]
+        return int((first.get('rows') or 0) * float(first.get('filtered') or 100) / 100)
+    cursor.execute(f"SELECT COUNT(*) as total {from_sql}", params)
+    return cursor.fetchone()['total']
+
+
+def version_query(tables):
+    return " UNION ALL ".join(
+        f"SELECT COUNT(*), UNIX_TIMESTAMP(MAX(updated_at)) FROM {table}" for table in tables
+    )
+
+
+def list_version(connection, *tables):
+    """Cheap version token for a list built from the given tables.
+
+    Row count plus newest updated_at per table notices inserts, updates
+    and deletes without reading any rows (MAX(updated_at) is answered
+    from its index). Returns (etag, last_modified). Timestamps have
+    one-second resolution, so two edits within the same second that
+    leave the row count unchanged can share a token.
+    """
+    cursor = connection.cursor()
+    cursor.execute(version_query(tables))
+    versions = cursor.fetchall()
+    cursor.close()
+    return version_token(tables, versions)
+
+
+def version_token(tables, versions):
+    """(etag, last_modified) from per-table (row count, newest updated_at) pairs"""
+    versions = [(int(count), int(stamp or 0)) for count, stamp in versions]
+    etag = hashlib.sha1(repr((tables, versions)).encode('utf-8')).hexdigest()[:20]
+    newest = max((stamp for _, stamp in versions), default=0)
+    last_modified = datetime.fromtimestamp(newest, timezone.utc) if newest else None
+    return etag, last_modified
+
+
+def is_not_modified(etag, last_modified):
+    """True if the client's copy (If-None-Match / If-Modified-Since) is current"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def with_validators(response, etag, last_modified):
+    """Attach ETag/Last-Modified and ask clients to revalidate before reuse"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+STREAM_BATCH_SIZE = 500
+
+
+def requested_stream_format():
+    """'json' or 'ndjson' if the client asked for a streamed export, else None"""
+    stream = request.args.get('stream')
+    if stream is None and request.accept_mimetypes.best == STREAM_FORMATS['ndjson']:
+        stream = 'ndjson'
+    return stream
+
+
+def stream_query(query, params, stream):
+    """Stream a query's rows as a JSON array or NDJSON.
+
+    Rows are pulled from an unbuffered cursor in batches and encoded as
+    they arrive, so memory stays flat and the first bytes go out before
+    MySQL has produced the last row. The pooled connection is owned by
+    the generator and returned when the stream ends or the client leaves.
+    """
+    if stream not in STREAM_FORMATS:
+        return jsonify({'error': f'stream must be one of: {", ".join(STREAM_FORMATS)}'}), 400
+
+    def generate():
+        with db_connection() as connection:
+            if not connection:
+                yield None
+                return
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query, params)
+                yield True  # query accepted: the caller can commit to a 200
+
+                first = True
+                if stream == 'json':
+                    yield '['
+                while True:
+                    rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                    if not rows:
+                        break
+                    if stream == 'ndjson':
+                        yield '\n'.join(json_dumps(row) for row in rows) + '\n'
+                    else:
+                        # Encode the batch as one array and drop its brackets
+                        yield ('' if first else ',') + json_dumps(rows)[1:-1]
+                    first = False
+                if stream == 'json':
+                    yield ']'
+            except GeneratorExit:
+                # Client went away mid-stream: drop the connection rather than
+                # draining the rest of an unbuffered result set
+                try:
+                    connection.close()
+                except Error:
+                    pass
+                raise
+            except Error as e:
+                # Headers are already sent; all we can do is end the body early
+                print(f"Error while streaming rows: {e}")
+
+    rows = generate()
+    try:
+        started = next(rows)
+    except Error as e:
+        rows.close()
+        return jsonify({'error': str(e)}), 500
+    if not started:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    response = Response(rows, mimetype=STREAM_FORMATS[stream])
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response, 200
+
+
+# ?format= for large listings: 'columnar' and 'msgpack' read plain tuples and
+# send the column names once instead of repeating them in every row
+LIST_FORMATS = {'rows': 'application/json', 'columnar': 'application/json', 'msgpack': 'application/msgpack'}
+
+
+def check_list_format(fmt):
+    """(error message, status) for an unusable ?format= value, or None"""
+    if fmt not in LIST_FORMATS:
+        return f'format must be one of: {", ".join(LIST_FORMATS)}', 400
+    if fmt == 'msgpack' and msgpack is None:
+        return 'MessagePack output is not available on this server', 406
+    return None
+
+
+def column_names(cursor):
+    return [column[0] for column in cursor.description]
+
+
+def columnar_response(columns, rows, fmt, **extra):
+    """{"columns": [...], "rows": [[...], ...]} plus extra keys, as JSON or MessagePack"""
+    body = {'columns': columns, 'rows': rows, **extra}
+    if fmt == 'msgpack':
+        return Response(packb(body), mimetype=LIST_FORMATS['msgpack'])
+    return jsonify(body)
+
+
+def stock_snapshot(connection, medicine_ids, lock=False):
+    """{medicine_id: (name, quantity, price, exp_date)} for inventory_events.
+
+    With lock, the rows are read FOR UPDATE so the snapshot still holds
+    when the caller's UPDATE runs.
+    """
+    medicine_ids = sorted(set(medicine_ids))
+    if not medicine_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(medicine_ids))
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT medicine_id, name, quantity, price, exp_date
+        FROM medicines
+        WHERE medicine_id IN ({placeholders})
+        ORDER BY medicine_id
+        {'FOR UPDATE' if lock else ''}
+    """, medicine_ids)
+    snapshot = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+    cursor.close()
+    return snapshot
+
+
+def adjust_stock(snapshot, changes):
+    """Copy of a stock_snapshot with quantities moved by {medicine_id: delta}"""
+    adjusted = dict(snapshot)
+    for medicine_id, delta in changes.items():
+        if medicine_id in adjusted:
+            name, quantity, price, exp_date = adjusted[medicine_id]
+            adjusted[medicine_id] = (name, quantity + delta, price, exp_date)
+    return adjusted
+
+
+def publish_events(connection, events):
+    """Store (type, payload) events for every process's push clients; a failure is only logged"""
+    if not events:
+        return
+    try:
+        store_events(connection, events)
+    except Error as e:
+        connection.rollback()
+        print(f"Error publishing notifications: {e}")
+
+
+def record_inventory_change(connection, before, after):
+    """Apply a committed medicine change to the KPI counters and alert index, and push it to clients"""
+    deltas = inventory_deltas(before, after)
+    kpi_state.apply(deltas)
+    alert_index.apply(before, after)
+    publish_events(connection, inventory_events(before, after, deltas))
 
 
 # ==================== SUPPLIER ENDPOINTS ====================
 
 @app.route('/api/suppliers', methods=['GET'])
+@response_cache.cached('suppliers', ttl=CACHE_TTL['suppliers'])
 def get_suppliers():
-    """Get all suppliers"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM suppliers ORDER BY supplier_name")
-        suppliers = cursor.fetchall()
+    """Get all suppliers (answers 304 when the client's ETag is current)"""
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        # Serialize datetime objects
-        for supplier in suppliers:
-            supplier['created_at'] = serialize_datetime(supplier.get('created_at'))
-            supplier['updated_at'] = serialize_datetime(supplier.get('updated_at'))
-        
-        return jsonify(suppliers), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            etag, last_modified = list_version(connection, 'suppliers')
+            if is_not_modified(etag, last_modified):
+                return with_validators(app.response_class(status=304), etag, last_modified)
+            
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM suppliers ORDER BY supplier_name")
+            suppliers = cursor.fetchall()
+            
+            return with_validators(jsonify(suppliers), etag, last_modified), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/suppliers', methods=['POST'])
+@response_cache.invalidates('suppliers')
 def add_supplier():
     """Add a new supplier"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        # Validate required fields
-        if 'supplier_name' not in data or 'contact_no' not in data:
-            return jsonify({'error': 'Missing required fields: supplier_name, contact_no'}), 400
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor()
-        query = "INSERT INTO suppliers (supplier_name, contact_no) VALUES (%s, %s)"
-        values = (data['supplier_name'], data['contact_no'])
-        cursor.execute(query, values)
-        connection.commit()
-        return jsonify({'message': 'Supplier added successfully', 'id': cursor.lastrowid}), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            # Validate required fields
+            if 'supplier_name' not in data or 'contact_no' not in data:
+                return jsonify({'error': 'Missing required fields: supplier_name, contact_no'}), 400
+            
+            cursor = connection.cursor()
+            query = "INSERT INTO suppliers (supplier_name, contact_no) VALUES (%s, %s)"
+            values = (data['supplier_name'], data['contact_no'])
+            cursor.execute(query, values)
+            connection.commit()
+            return jsonify({'message': 'Supplier added successfully', 'id': cursor.lastrowid}), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 # ==================== MEDICINE ENDPOINTS ====================
 
+MEDICINE_LIST_QUERY = """
+    SELECT m.*, s.supplier_name, s.contact_no
+    FROM medicines m
+    JOIN suppliers s ON m.supplier_id = s.supplier_id
+    ORDER BY m.name
+"""
+
+
 @app.route('/api/medicines', methods=['GET'])
+@response_cache.cached('medicines', 'suppliers', ttl=CACHE_TTL['medicines'], bypass=requested_stream_format)
 def get_medicines():
-    """Get all medicines with supplier information"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """Get all medicines with supplier information.
+
+    Answers 304 when the client's ETag is current. ``stream=json`` or
+    ``stream=ndjson`` (or ``Accept: application/x-ndjson``) streams the
+    full list instead of building it in memory; ``format=columnar`` or
+    ``format=msgpack`` returns column names once and rows as arrays.
+    """
+    stream = requested_stream_format()
+    if stream:
+        return stream_query(MEDICINE_LIST_QUERY, (), stream)
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT m.*, s.supplier_name, s.contact_no
-            FROM medicines m
-            JOIN suppliers s ON m.supplier_id = s.supplier_id
-            ORDER BY m.name
-        """
-        cursor.execute(query)
-        medicines = cursor.fetchall()
-        
-        # Serialize date and datetime objects
-        for medicine in medicines:
-            medicine['mfg_date'] = serialize_date(medicine.get('mfg_date'))
-            medicine['exp_date'] = serialize_date(medicine.get('exp_date'))
-            medicine['created_at'] = serialize_datetime(medicine.get('created_at'))
-            medicine['updated_at'] = serialize_datetime(medicine.get('updated_at'))
+    fmt = request.args.get('format', 'rows')
+    problem = check_list_format(fmt)
+    if problem:
+        return jsonify({'error': problem[0]}), problem[1]
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify(medicines), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            etag, last_modified = list_version(connection, 'medicines', 'suppliers')
+            if is_not_modified(etag, last_modified):
+                return with_validators(app.response_class(status=304), etag, last_modified)
+            
+            if fmt != 'rows':
+                cursor = connection.cursor()
+                cursor.execute(MEDICINE_LIST_QUERY)
+                response = columnar_response(column_names(cursor), cursor.fetchall(), fmt)
+                return with_validators(response, etag, last_modified), 200
+            
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(MEDICINE_LIST_QUERY)
+            medicines = cursor.fetchall()
+            
+            return with_validators(jsonify(medicines), etag, last_modified), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines/<int:medicine_id>', methods=['GET'])
 def get_medicine(medicine_id):
     """Get a specific medicine by ID"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT m.*, s.supplier_name, s.contact_no
-            FROM medicines m
-            JOIN suppliers s ON m.supplier_id = s.supplier_id
-            WHERE m.medicine_id = %s
-        """
-        cursor.execute(query, (medicine_id,))
-        medicine = cursor.fetchone()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        if medicine:
-            medicine['mfg_date'] = serialize_date(medicine.get('mfg_date'))
-            medicine['exp_date'] = serialize_date(medicine.get('exp_date'))
-            medicine['created_at'] = serialize_datetime(medicine.get('created_at'))
-            medicine['updated_at'] = serialize_datetime(medicine.get('updated_at'))
-            return jsonify(medicine), 200
-        else:
-            return jsonify({'error': 'Medicine not found'}), 404
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            query = """
+                SELECT m.*, s.supplier_name, s.contact_no
+                FROM medicines m
+                JOIN suppliers s ON m.supplier_id = s.supplier_id
+                WHERE m.medicine_id = %s
+            """
+            cursor.execute(query, (medicine_id,))
+            medicine = cursor.fetchone()
+            
+            if medicine:
+                return jsonify(medicine), 200
+            else:
+                return jsonify({'error': 'Medicine not found'}), 404
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines/search', methods=['GET'])
 def search_medicines():
-    """Search medicines by name, company, or supplier"""
-    search_term = request.args.get('q', '')
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """Search medicines by name, company, or supplier.
+
+    Results are ranked by full-text relevance. ``mode=prefix`` (default)
+    matches words starting with each term for search-as-you-type,
+    ``mode=word`` matches whole words only; ``limit`` caps the results.
+    """
+    search_term = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'prefix')
+    limit = result_limit(request.args.get('limit', type=int))
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT m.*, s.supplier_name, s.contact_no
-            FROM medicines m
-            JOIN suppliers s ON m.supplier_id = s.supplier_id
-            WHERE m.name LIKE %s OR m.company LIKE %s OR s.supplier_name LIKE %s
-            ORDER BY m.name
-        """
-        search_pattern = f'%{search_term}%'
-        cursor.execute(query, (search_pattern, search_pattern, search_pattern))
-        medicines = cursor.fetchall()
-        
-        # Serialize date objects
-        for medicine in medicines:
-            medicine['mfg_date'] = serialize_date(medicine.get('mfg_date'))
-            medicine['exp_date'] = serialize_date(medicine.get('exp_date'))
-            medicine['created_at'] = serialize_datetime(medicine.get('created_at'))
-            medicine['updated_at'] = serialize_datetime(medicine.get('updated_at'))
+    if mode not in SEARCH_MODES:
+        return jsonify({'error': f'mode must be one of: {", ".join(SEARCH_MODES)}'}), 400
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify(medicines), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            against = boolean_query(search_term, mode)
+            
+            if against:
+                # Each branch is driven by its own FULLTEXT index; OR-ing the
+                # two MATCH() predicates in one WHERE would force a full scan
+                query = """
+                    SELECT m.*, s.supplier_name, s.contact_no, hits.relevance
+                    FROM (
+                        SELECT medicine_id, MAX(relevance) AS relevance
+                        FROM (
+                            (SELECT medicine_id,
+                                    MATCH(name, company) AGAINST (%s IN BOOLEAN MODE) AS relevance
+                             FROM medicines
+                             WHERE MATCH(name, company) AGAINST (%s IN BOOLEAN MODE)
+                             ORDER BY relevance DESC
+                             LIMIT %s)
+                            UNION ALL
+                            (SELECT sm.medicine_id,
+                                    MATCH(ss.supplier_name) AGAINST (%s IN BOOLEAN MODE) AS relevance
+                             FROM suppliers ss
+                             JOIN medicines sm ON sm.supplier_id = ss.supplier_id
+                             WHERE MATCH(ss.supplier_name) AGAINST (%s IN BOOLEAN MODE)
+                             ORDER BY relevance DESC
+                             LIMIT %s)
+                        ) matches
+                        GROUP BY medicine_id
+                    ) hits
+                    JOIN medicines m ON m.medicine_id = hits.medicine_id
+                    JOIN suppliers s ON m.supplier_id = s.supplier_id
+                    ORDER BY hits.relevance DESC, m.name
+                    LIMIT %s
+                """
+                cursor.execute(query, (against, against, limit, against, against, limit, limit))
+            else:
+                # Too short for the full-text index: a leading-prefix LIKE can
+                # still be answered from idx_name
+                query = """
+                    SELECT m.*, s.supplier_name, s.contact_no
+                    FROM medicines m
+                    JOIN suppliers s ON m.supplier_id = s.supplier_id
+                    WHERE m.name LIKE %s
+                    ORDER BY m.name
+                    LIMIT %s
+                """
+                cursor.execute(query, (f'{search_term}%', limit))
+            medicines = cursor.fetchall()
+            
+            return jsonify(medicines), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines/expiring', methods=['GET'])
+@response_cache.cached('medicines', 'suppliers', ttl=CACHE_TTL['expiring'])
 def get_expiring_medicines():
     """Get medicines expiring within specified days (default 30 days)"""
     days = request.args.get('days', 30, type=int)
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT m.*, s.supplier_name, s.contact_no,
-                   DATEDIFF(m.exp_date, CURDATE()) as days_until_expiry
-            FROM medicines m
-            JOIN suppliers s ON m.supplier_id = s.supplier_id
-            WHERE m.exp_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
-            AND m.exp_date >= CURDATE()
-            ORDER BY m.exp_date
-        """
-        cursor.execute(query, (days,))
-        medicines = cursor.fetchall()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        for medicine in medicines:
-            medicine['mfg_date'] = serialize_date(medicine.get('mfg_date'))
-            medicine['exp_date'] = serialize_date(medicine.get('exp_date'))
-            medicine['created_at'] = serialize_datetime(medicine.get('created_at'))
-            medicine['updated_at'] = serialize_datetime(medicine.get('updated_at'))
-        
-        return jsonify(medicines), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            query = """
+                SELECT m.*, s.supplier_name, s.contact_no,
+                       DATEDIFF(m.exp_date, CURDATE()) as days_until_expiry
+                FROM medicines m
+                JOIN suppliers s ON m.supplier_id = s.supplier_id
+                WHERE m.exp_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                AND m.exp_date >= CURDATE()
+                ORDER BY m.exp_date
+            """
+            cursor.execute(query, (days,))
+            medicines = cursor.fetchall()
+            
+            return jsonify(medicines), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines', methods=['POST'])
+@response_cache.invalidates('medicines')
 def add_medicine():
     """Add a new medicine"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        try:
+            # Validate required fields
+            required_fields = ['name', 'company', 'mfg_date', 'exp_date', 'quantity', 'price', 'supplier_id']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({'error': f'Missing required field: {field}'}), 400
+            
+            # Validate numeric fields
+            try:
+                quantity = int(data['quantity'])
+                price = float(data['price'])
+                supplier_id = int(data['supplier_id'])
+                
+                if quantity < 0:
+                    return jsonify({'error': 'Quantity must be non-negative'}), 400
+                if price < 0:
+                    return jsonify({'error': 'Price must be non-negative'}), 400
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid numeric value'}), 400
+            
+            cursor = connection.cursor()
+            query = """
+                INSERT INTO medicines (name, company, mfg_date, exp_date, quantity, price, supplier_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            values = (
+                data['name'],
+                data['company'],
+                data['mfg_date'],
+                data['exp_date'],
+                quantity,
+                price,
+                supplier_id
+            )
+            cursor.execute(query, values)
+            connection.commit()
+            added = {cursor.lastrowid: (data['name'], quantity, price, data['exp_date'])}
+            record_inventory_change(connection, {}, added)
+            return jsonify({'message': 'Medicine added successfully', 'id': cursor.lastrowid}), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/medicines/bulk', methods=['POST'])
+@response_cache.invalidates('medicines')
+def import_medicines():
+    """Import medicines from a CSV or NDJSON request body.
+
+    Each row carries the add_medicine fields, with either supplier_id or
+    supplier_name. The body is read incrementally and committed one
+    chunk at a time; invalid rows are skipped and listed in the report
+    by line number, so a bad row never blocks the rest of the file.
+    """
+    fmt = import_format(request.mimetype, request.args.get('format'))
+    if not fmt:
+        return jsonify({'error': 'Send text/csv or application/x-ndjson (or ?format=csv|ndjson)'}), 415
     
-    try:
-        # Validate required fields
-        required_fields = ['name', 'company', 'mfg_date', 'exp_date', 'quantity', 'price', 'supplier_id']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+    report = {'inserted': 0, 'failed': 0, 'errors': []}
+    
+    def reject(line_no, message):
+        report['failed'] += 1
+        if len(report['errors']) < BULK_IMPORT_CONFIG['max_errors']:
+            report['errors'].append({'line': line_no, 'error': message})
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        # Validate numeric fields
         try:
-            quantity = int(data['quantity'])
-            price = float(data['price'])
-            supplier_id = int(data['supplier_id'])
-            
-            if quantity < 0:
-                return jsonify({'error': 'Quantity must be non-negative'}), 400
-            if price < 0:
-                return jsonify({'error': 'Price must be non-negative'}), 400
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid numeric value'}), 400
+            cursor = connection.cursor()
+            suppliers = {}
+            for chunk in chunked(iter_rows(request.stream, fmt)):
+                valid = []
+                for line_no, row in chunk:
+                    values, supplier_ref, error = validate_row(row)
+                    if error:
+                        reject(line_no, error)
+                    else:
+                        valid.append((line_no, values, supplier_ref))
+                
+                resolve_suppliers(cursor, [ref for _, _, ref in valid], suppliers)
+                
+                batch = []
+                added = {}
+                for line_no, values, supplier_ref in valid:
+                    supplier_id = suppliers.get(supplier_ref)
+                    if supplier_id is None:
+                        reject(line_no, f'Unknown supplier: {supplier_ref[1]}')
+                    else:
+                        batch.append((*values, supplier_id))
+                        name, _, _, exp_date, quantity, price = values
+                        added[('line', line_no)] = (name, quantity, price, exp_date)
+                
+                if batch:
+                    # executemany sends the whole batch as one multi-row INSERT
+                    cursor.executemany(INSERT_MEDICINE, batch)
+                    connection.commit()
+                    report['inserted'] += len(batch)
+                    record_inventory_change(connection, {}, added)
+        except UnicodeDecodeError:
+            connection.rollback()
+            report['error'] = 'Body must be UTF-8'
+            return jsonify(report), 400
+        except Error as e:
+            connection.rollback()
+            report['error'] = str(e)
+            return jsonify(report), 500
+    
+    if report['inserted'] == 0 and report['failed'] == 0:
+        return jsonify({'error': 'No rows found in request body'}), 400
+    return jsonify(report), 201 if report['inserted'] else 422
+
+
+@app.route('/api/medicines/bulk', methods=['PATCH'])
+@response_cache.invalidates('medicines')
+def bulk_update_medicines():
+    """Apply partial updates to many medicines in one transaction.
+
+    Body: {"updates": [{"medicine_id": 1, "quantity_delta": -5,
+    "price": 12.5, "updated_at": "..."}, ...]}. Any of the add_medicine
+    fields may be set; quantity_delta adjusts stock relative to the
+    stored value. When updated_at is given the row must not have changed
+    since, otherwise nothing is written and the conflicts are returned.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('updates')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'updates must be a non-empty list'}), 400
+    
+    updates, expected, errors = [], {}, []
+    for index, entry in enumerate(entries):
+        medicine_id, changes, updated_at, error = validate_update(entry)
+        if not error and medicine_id in expected:
+            error = 'Duplicate medicine_id'
+        if error:
+            errors.append({'index': index, 'medicine_id': medicine_id, 'error': error})
+            continue
+        updates.append((medicine_id, changes))
+        expected[medicine_id] = updated_at
+    if errors:
+        return jsonify({'error': 'Invalid updates', 'errors': errors}), 400
+    
+    ids = sorted(expected)
+    placeholders = ', '.join(['%s'] * len(ids))
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = connection.cursor()
-        query = """
-            INSERT INTO medicines (name, company, mfg_date, exp_date, quantity, price, supplier_id)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        values = (
-            data['name'],
-            data['company'],
-            data['mfg_date'],
-            data['exp_date'],
-            quantity,
-            price,
-            supplier_id
-        )
-        cursor.execute(query, values)
-        connection.commit()
-        return jsonify({'message': 'Medicine added successfully', 'id': cursor.lastrowid}), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            
+            # Lock every target row (in primary key order) so the checks
+            # below still hold when the UPDATE runs
+            cursor.execute(f"""
+                SELECT medicine_id, name, quantity, price, exp_date, updated_at
+                FROM medicines
+                WHERE medicine_id IN ({placeholders})
+                ORDER BY medicine_id
+                FOR UPDATE
+            """, ids)
+            current = {row['medicine_id']: row for row in cursor.fetchall()}
+            before = {
+                medicine_id: (row['name'], row['quantity'], row['price'], row['exp_date'])
+                for medicine_id, row in current.items()
+            }
+            
+            supplier_refs = [('id', changes['supplier_id']) for _, changes in updates if 'supplier_id' in changes]
+            suppliers = {}
+            resolve_suppliers(connection.cursor(), supplier_refs, suppliers)
+            
+            conflicts = []
+            for medicine_id, changes in updates:
+                row = current.get(medicine_id)
+                if row is None:
+                    conflicts.append({'medicine_id': medicine_id, 'error': 'Medicine not found'})
+                    continue
+                if expected[medicine_id] and row['updated_at'] and expected[medicine_id] != parse_timestamp(row['updated_at']):
+                    conflicts.append({
+                        'medicine_id': medicine_id,
+                        'error': 'Medicine was modified since updated_at',
+                        'updated_at': row['updated_at']
+                    })
+                elif row['quantity'] + changes.get('quantity_delta', 0) < 0:
+                    conflicts.append({
+                        'medicine_id': medicine_id,
+                        'error': 'Quantity would go negative',
+                        'quantity': row['quantity']
+                    })
+                elif 'supplier_id' in changes and ('id', changes['supplier_id']) not in suppliers:
+                    conflicts.append({'medicine_id': medicine_id, 'error': f"Unknown supplier_id: {changes['supplier_id']}"})
+            if conflicts:
+                connection.rollback()
+                return jsonify({'error': 'No updates applied', 'conflicts': conflicts}), 409
+            
+            for query, params in update_batches(updates):
+                cursor.execute(query, params)
+            
+            cursor.execute(f"""
+                SELECT medicine_id, quantity, price, updated_at
+                FROM medicines
+                WHERE medicine_id IN ({placeholders})
+                ORDER BY medicine_id
+            """, ids)
+            medicines = cursor.fetchall()
+            after = stock_snapshot(connection, ids)
+            connection.commit()
+            record_inventory_change(connection, before, after)
+            
+            return jsonify({'message': f'{len(medicines)} medicines updated', 'medicines': medicines}), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines/<int:medicine_id>', methods=['PUT'])
+@response_cache.invalidates('medicines')
 def update_medicine(medicine_id):
     """Update an existing medicine"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        # Validate required fields
-        required_fields = ['name', 'company', 'mfg_date', 'exp_date', 'quantity', 'price', 'supplier_id']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        # Validate numeric fields
         try:
-            quantity = int(data['quantity'])
-            price = float(data['price'])
-            supplier_id = int(data['supplier_id'])
-            
-            if quantity < 0:
-                return jsonify({'error': 'Quantity must be non-negative'}), 400
-            if price < 0:
-                return jsonify({'error': 'Price must be non-negative'}), 400
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid numeric value'}), 400
-        
-        cursor = connection.cursor()
-        query = """
-            UPDATE medicines
-            SET name = %s, company = %s, mfg_date = %s, exp_date = %s,
-                quantity = %s, price = %s, supplier_id = %s
-            WHERE medicine_id = %s
-        """
-        values = (
-            data['name'],
-            data['company'],
-            data['mfg_date'],
-            data['exp_date'],
-            quantity,
-            price,
-            supplier_id,
-            medicine_id
-        )
-        cursor.execute(query, values)
-        connection.commit()
-        
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Medicine not found'}), 404
-        
-        return jsonify({'message': 'Medicine updated successfully'}), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+            # Validate required fields
+            required_fields = ['name', 'company', 'mfg_date', 'exp_date', 'quantity', 'price', 'supplier_id']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({'error': f'Missing required field: {field}'}), 400
+            
+            # Validate numeric fields
+            try:
+                quantity = int(data['quantity'])
+                price = float(data['price'])
+                supplier_id = int(data['supplier_id'])
+                
+                if quantity < 0:
+                    return jsonify({'error': 'Quantity must be non-negative'}), 400
+                if price < 0:
+                    return jsonify({'error': 'Price must be non-negative'}), 400
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid numeric value'}), 400
+            
+            before = stock_snapshot(connection, [medicine_id], lock=True)
+            cursor = connection.cursor()
+            query = """
+                UPDATE medicines
+                SET name = %s, company = %s, mfg_date = %s, exp_date = %s,
+                    quantity = %s, price = %s, supplier_id = %s
+                WHERE medicine_id = %s
+            """
+            values = (
+                data['name'],
+                data['company'],
+                data['mfg_date'],
+                data['exp_date'],
+                quantity,
+                price,
+                supplier_id,
+                medicine_id
+            )
+            cursor.execute(query, values)
+            connection.commit()
+            
+            if not before:
+                return jsonify({'error': 'Medicine not found'}), 404
+            
+            after = {medicine_id: (data['name'], quantity, price, data['exp_date'])}
+            record_inventory_change(connection, before, after)
+            return jsonify({'message': 'Medicine updated successfully'}), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/medicines/<int:medicine_id>', methods=['DELETE'])
+@response_cache.invalidates('medicines')
 def delete_medicine(medicine_id):
     """Delete a medicine"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        query = "DELETE FROM medicines WHERE medicine_id = %s"
-        cursor.execute(query, (medicine_id,))
-        connection.commit()
-        
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Medicine not found'}), 404
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify({'message': 'Medicine deleted successfully'}), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            before = stock_snapshot(connection, [medicine_id], lock=True)
+            cursor = connection.cursor()
+            query = "DELETE FROM medicines WHERE medicine_id = %s"
+            cursor.execute(query, (medicine_id,))
+            connection.commit()
+            
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Medicine not found'}), 404
+            
+            record_inventory_change(connection, before, {})
+            return jsonify({'message': 'Medicine deleted successfully'}), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'Medical Storage Management System API is running'}), 200
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Medical Storage Management System API is running',
+        'db_pool': db_pool.stats(),
+        'cache': response_cache.stats()
+    }), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, connection pool, cache and push metrics in Prometheus text format"""
+    body = request_metrics.render(pool=db_pool.stats(), cache=response_cache.stats(),
+                                  notifications=notification_hub.stats())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8'), 200
 
 
 # ==================== AUTH ENDPOINTS ====================
@@ -415,731 +958,941 @@ def login():
     return jsonify({'message': 'Invalid credentials'}), 401
 
 
+# ==================== PUSH NOTIFICATIONS ====================
+
+@app.route('/ws/notifications', methods=['GET'])
+def notifications_stream():
+    """Server-Sent Events stream of kpi_update, notification and sale events.
+
+    Replaces polling /api/kpis and /api/inventory/alerts: each event is
+    a delta published when a write commits. Browsers reconnect on their
+    own and send Last-Event-ID, which replays the events they missed.
+    """
+    last_event_id = parse_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    notification_feed.ensure_running(db_connection)
+    
+    def generate():
+        subscriber = notification_hub.subscribe(Subscriber(NOTIFICATION_CONFIG['max_pending']), last_event_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = subscriber.get(timeout=NOTIFICATION_CONFIG['heartbeat'])
+                if event is OVERFLOW:
+                    return
+                # Comments keep proxies from timing out an idle stream and
+                # surface a closed connection on the next write
+                yield sse_message(event) if event else ': keep-alive\n\n'
+        finally:
+            notification_hub.unsubscribe(subscriber)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response, 200
+
+
 # ==================== KPI ENDPOINTS ====================
 
+KPI_QUERY = """
+    SELECT COALESCE(SUM(price * quantity), 0) as inventory_value,
+           COALESCE(SUM(quantity < 10), 0) as pending_count,
+           COALESCE(SUM(quantity < 5), 0) as low_stock_count
+    FROM medicines
+"""
+
+
+def reconcile_kpis():
+    """Reload the KPI counters from the database if they are due; False if that failed"""
+    if not kpi_state.claim_reconcile():
+        return True
+    with db_connection() as connection:
+        if not connection:
+            kpi_state.release_reconcile()
+            return False
+        try:
+            cursor = connection.cursor(dictionary=True)
+            # All medicine KPIs in a single scan using conditional aggregation
+            cursor.execute(KPI_QUERY)
+            kpi_state.load(cursor.fetchone())
+            return True
+        except Error as e:
+            kpi_state.release_reconcile()
+            print(f"Error reloading KPI counters: {e}")
+            return False
+
+
 @app.route('/api/kpis', methods=['GET'])
 def get_kpis():
-    """Get dashboard KPIs"""
-    connection = get_db_connection()
-    if not connection:
+    """Get dashboard KPIs.
+
+    Served from the in-memory counters; the medicines table is only
+    scanned on first use and every KPI_RECONCILE_SECONDS after that.
+    """
+    if not reconcile_kpis() and not kpi_state.loaded:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Today's Sales (sum of price * quantity for today's date - simplified)
-        cursor.execute("""
-            SELECT COALESCE(SUM(price * quantity), 0) as total_value
-            FROM medicines
-        """)
-        total_value_result = cursor.fetchone()
-        today_sales = float(total_value_result['total_value']) * 0.1  # Simplified: 10% of total
-        
-        # Pending Prescriptions (medicines with low stock)
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM medicines
-            WHERE quantity < 10
-        """)
-        pending_result = cursor.fetchone()
-        pending_count = pending_result['count']
-        
-        # Low Stock Items
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM medicines
-            WHERE quantity < 5
-        """)
-        low_stock_result = cursor.fetchone()
-        low_stock_count = low_stock_result['count']
-        
-        # Total Inventory Value
-        cursor.execute("""
-            SELECT COALESCE(SUM(price * quantity), 0) as total_value
-            FROM medicines
-        """)
-        inventory_result = cursor.fetchone()
-        inventory_value = float(inventory_result['total_value'])
-        
-        kpis = [
-            {
-                'id': 'k1',
-                'label': "Today's Sales",
-                'value': round(today_sales, 2),
-                'delta': 4.3,
-                'unit': 'USD'
-            },
-            {
-                'id': 'k2',
-                'label': 'Pending Prescriptions',
-                'value': pending_count,
-                'delta': -8.0
-            },
-            {
-                'id': 'k3',
-                'label': 'Low Stock Items',
-                'value': low_stock_count,
-                'delta': 1.5
-            },
-            {
-                'id': 'k4',
-                'label': 'Total Inventory Value',
-                'value': round(inventory_value, 2),
-                'delta': 2.1,
-                'unit': 'USD'
-            }
-        ]
-        
-        return jsonify(kpis), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    figures = kpi_state.figures()
+    inventory_value = figures['inventory_value']
+    
+    # Today's Sales (simplified: 10% of total inventory value)
+    today_sales = inventory_value * 0.1
+    
+    # Pending Prescriptions (medicines with low stock)
+    pending_count = figures['pending_count']
+    
+    # Low Stock Items
+    low_stock_count = figures['low_stock_count']
+    
+    kpis = [
+        {
+            'id': 'k1',
+            'label': "Today's Sales",
+            'value': round(today_sales, 2),
+            'delta': 4.3,
+            'unit': 'USD'
+        },
+        {
+            'id': 'k2',
+            'label': 'Pending Prescriptions',
+            'value': pending_count,
+            'delta': -8.0
+        },
+        {
+            'id': 'k3',
+            'label': 'Low Stock Items',
+            'value': low_stock_count,
+            'delta': 1.5
+        },
+        {
+            'id': 'k4',
+            'label': 'Total Inventory Value',
+            'value': round(inventory_value, 2),
+            'delta': 2.1,
+            'unit': 'USD'
+        }
+    ]
+    
+    return jsonify(kpis), 200
 
 
 # ==================== TRANSACTIONS ENDPOINTS ====================
 
 @app.route('/api/transactions', methods=['GET'])
 def get_transactions():
-    """Get recent transactions (mocked from medicines data)"""
+    """Get recent transactions (mocked from medicines data).
+
+    Pass ``cursor`` (empty for the first page, then the returned
+    ``next_cursor``) to page by keyset instead of ``page``; ``count``
+    selects an exact, estimated or omitted total.
+    """
     limit = request.args.get('limit', 10, type=int)
     page = request.args.get('page', 1, type=int)
+    keyset = 'cursor' in request.args
+    count_mode = request.args.get('count', 'none' if keyset else 'exact')
     
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    if count_mode not in COUNT_MODES:
+        return jsonify({'error': f'count must be one of: {", ".join(COUNT_MODES)}'}), 400
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get recent medicines as transactions (simplified)
-        cursor.execute("""
-            SELECT 
-                medicine_id as id,
-                updated_at as date,
-                CONCAT('Customer-', medicine_id) as customer,
-                1 as items,
-                price as total,
-                CASE 
-                    WHEN quantity > 5 THEN 'completed'
-                    WHEN quantity > 0 THEN 'pending'
-                    ELSE 'refunded'
-                END as status
-            FROM medicines
-            ORDER BY updated_at DESC
-            LIMIT %s OFFSET %s
-        """, (limit, (page - 1) * limit))
-        
-        transactions = cursor.fetchall()
-        
-        # Get total count
-        cursor.execute("SELECT COUNT(*) as total FROM medicines")
-        total_result = cursor.fetchone()
-        total = total_result['total']
-        
-        # Serialize datetime
-        for transaction in transactions:
-            transaction['date'] = serialize_datetime(transaction.get('date'))
-            transaction['total'] = float(transaction['total'])
+    after = None
+    if keyset and request.args['cursor']:
+        after = decode_cursor(request.args['cursor'], 2)
+        if after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify({
-            'items': transactions,
-            'total': total
-        }), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            
+            where_sql = ""
+            params = []
+            if after:
+                seek_sql, seek_params = keyset_before(['updated_at', 'medicine_id'], after)
+                where_sql = f"WHERE {seek_sql}"
+                params.extend(seek_params)
+            
+            # Fetch one extra row to know whether another page exists
+            params.append(limit + 1)
+            offset_sql = ""
+            if not keyset:
+                offset_sql = "OFFSET %s"
+                params.append((page - 1) * limit)
+            
+            # Get recent medicines as transactions (simplified)
+            cursor.execute(f"""
+                SELECT 
+                    medicine_id as id,
+                    updated_at as date,
+                    CONCAT('Customer-', medicine_id) as customer,
+                    1 as items,
+                    price as total,
+                    CASE 
+                        WHEN quantity > 5 THEN 'completed'
+                        WHEN quantity > 0 THEN 'pending'
+                        ELSE 'refunded'
+                    END as status
+                FROM medicines
+                {where_sql}
+                ORDER BY updated_at DESC, medicine_id DESC
+                LIMIT %s {offset_sql}
+            """, params)
+            
+            transactions = cursor.fetchall()
+            
+            next_cursor = None
+            if len(transactions) > limit:
+                transactions = transactions[:limit]
+                last = transactions[-1]
+                next_cursor = encode_cursor([last['date'], last['id']])
+            
+            # Get total count
+            total = count_rows(cursor, "FROM medicines", [], count_mode)
+            
+            return jsonify({
+                'items': transactions,
+                'total': total,
+                'next_cursor': next_cursor
+            }), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 # ==================== INVENTORY ALERTS ====================
 
+ALERT_CANDIDATES_QUERY = """
+    SELECT medicine_id, name, quantity, exp_date
+    FROM medicines
+    WHERE quantity < %s OR exp_date <= %s
+"""
+
+
+def reload_alerts():
+    """Rebuild the alert index if it is due (new day, stale or interval passed); False if that failed"""
+    today = date.today()
+    if not alert_index.claim_reload(today):
+        return True
+    with db_connection() as connection:
+        if not connection:
+            alert_index.release_reload()
+            return False
+        try:
+            cursor = connection.cursor()
+            cursor.execute(ALERT_CANDIDATES_QUERY, (alert_index.low_stock_below, alert_index.window_end(today)))
+            alert_index.load(cursor.fetchall(), today)
+            return True
+        except Error as e:
+            alert_index.release_reload()
+            print(f"Error rebuilding the alert index: {e}")
+            return False
+
+
 @app.route('/api/inventory/alerts', methods=['GET'])
 def get_inventory_alerts():
-    """Get inventory alerts (low stock and expiring items)"""
-    connection = get_db_connection()
-    if not connection:
+    """Get inventory alerts (low stock and expiring items).
+
+    Low stock (quantity < 5) or expiring within 30 days, lowest stock
+    first, from the in-memory alert index.
+    """
+    if not reload_alerts() and not alert_index.loaded:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get low stock items (quantity < 5) or expiring soon (within 30 days)
-        cursor.execute("""
-            SELECT 
-                medicine_id as id,
-                name,
-                CONCAT('MED-', medicine_id) as sku,
-                quantity as stock,
-                exp_date as expiryDate
-            FROM medicines
-            WHERE quantity < 5 OR exp_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-            ORDER BY quantity ASC, exp_date ASC
-            LIMIT 10
-        """)
-        
-        alerts = cursor.fetchall()
-        
-        # Serialize dates
-        for alert in alerts:
-            if alert.get('expiryDate'):
-                alert['expiryDate'] = serialize_date(alert['expiryDate'])
-        
-        return jsonify(alerts), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    return jsonify(alert_index.top(10)), 200
 
 
 # ==================== CUSTOMER ENDPOINTS ====================
 
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    """Get all customers with optional search"""
-    search = request.args.get('search', '')
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """Get all customers with optional search.
+
+    ``search`` is matched against name, email and phone through the
+    full-text index and ranked by relevance; ``mode`` and ``limit``
+    behave as in /api/medicines/search. ``stream=json|ndjson`` and
+    ``format=columnar|msgpack`` work as in /api/medicines.
+    """
+    search = request.args.get('search', '').strip()
+    mode = request.args.get('mode', 'prefix')
+    limit = result_limit(request.args.get('limit', type=int))
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        if search:
-            query = """
-                SELECT * FROM customers
-                WHERE name LIKE %s OR email LIKE %s OR phone LIKE %s
-                ORDER BY name
-            """
-            search_pattern = f'%{search}%'
-            cursor.execute(query, (search_pattern, search_pattern, search_pattern))
-        else:
-            cursor.execute("SELECT * FROM customers ORDER BY name")
-        
-        customers = cursor.fetchall()
-        for customer in customers:
-            customer['created_at'] = serialize_datetime(customer.get('created_at'))
-            customer['updated_at'] = serialize_datetime(customer.get('updated_at'))
+    if mode not in SEARCH_MODES:
+        return jsonify({'error': f'mode must be one of: {", ".join(SEARCH_MODES)}'}), 400
+    
+    against = boolean_query(search, mode)
+    if against:
+        query = """
+            SELECT *, MATCH(name, email, phone) AGAINST (%s IN BOOLEAN MODE) AS relevance
+            FROM customers
+            WHERE MATCH(name, email, phone) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY relevance DESC, name
+            LIMIT %s
+        """
+        params = (against, against, limit)
+    elif search:
+        # Too short for the full-text index: prefix match on idx_name
+        query = """
+            SELECT * FROM customers
+            WHERE name LIKE %s
+            ORDER BY name
+            LIMIT %s
+        """
+        params = (f'{search}%', limit)
+    else:
+        query = "SELECT * FROM customers ORDER BY name"
+        params = ()
+    
+    stream = requested_stream_format()
+    if stream:
+        return stream_query(query, params, stream)
+    
+    fmt = request.args.get('format', 'rows')
+    problem = check_list_format(fmt)
+    if problem:
+        return jsonify({'error': problem[0]}), problem[1]
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify(customers), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            if fmt != 'rows':
+                cursor = connection.cursor()
+                cursor.execute(query, params)
+                return columnar_response(column_names(cursor), cursor.fetchall(), fmt), 200
+            
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            
+            customers = cursor.fetchall()
+            
+            return jsonify(customers), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/customers/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
     """Get a specific customer"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
-        customer = cursor.fetchone()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        if not customer:
-            return jsonify({'error': 'Customer not found'}), 404
-        
-        customer['created_at'] = serialize_datetime(customer.get('created_at'))
-        customer['updated_at'] = serialize_datetime(customer.get('updated_at'))
-        
-        return jsonify(customer), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
+            customer = cursor.fetchone()
+            
+            if not customer:
+                return jsonify({'error': 'Customer not found'}), 404
+            
+            return jsonify(customer), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/customers', methods=['POST'])
 def add_customer():
     """Add a new customer"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        query = """
-            INSERT INTO customers (name, email, phone, address)
-            VALUES (%s, %s, %s, %s)
-        """
-        cursor.execute(query, (
-            data.get('name'),
-            data.get('email'),
-            data.get('phone'),
-            data.get('address')
-        ))
-        connection.commit()
-        customer_id = cursor.lastrowid
-        
-        cursor.close()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
-        customer = cursor.fetchone()
-        customer['created_at'] = serialize_datetime(customer.get('created_at'))
-        customer['updated_at'] = serialize_datetime(customer.get('updated_at'))
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify(customer), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
+        try:
+            cursor = connection.cursor()
+            query = """
+                INSERT INTO customers (name, email, phone, address)
+                VALUES (%s, %s, %s, %s)
+            """
+            cursor.execute(query, (
+                data.get('name'),
+                data.get('email'),
+                data.get('phone'),
+                data.get('address')
+            ))
+            connection.commit()
+            customer_id = cursor.lastrowid
+            
             cursor.close()
-            connection.close()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
+            customer = cursor.fetchone()
+            
+            return jsonify(customer), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/customers/<int:customer_id>', methods=['PUT'])
 def update_customer(customer_id):
     """Update a customer"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        query = """
-            UPDATE customers
-            SET name = %s, email = %s, phone = %s, address = %s
-            WHERE customer_id = %s
-        """
-        cursor.execute(query, (
-            data.get('name'),
-            data.get('email'),
-            data.get('phone'),
-            data.get('address'),
-            customer_id
-        ))
-        connection.commit()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor.close()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
-        customer = cursor.fetchone()
-        
-        if not customer:
-            return jsonify({'error': 'Customer not found'}), 404
-        
-        customer['created_at'] = serialize_datetime(customer.get('created_at'))
-        customer['updated_at'] = serialize_datetime(customer.get('updated_at'))
-        
-        return jsonify(customer), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
+        try:
+            cursor = connection.cursor()
+            query = """
+                UPDATE customers
+                SET name = %s, email = %s, phone = %s, address = %s
+                WHERE customer_id = %s
+            """
+            cursor.execute(query, (
+                data.get('name'),
+                data.get('email'),
+                data.get('phone'),
+                data.get('address'),
+                customer_id
+            ))
+            connection.commit()
+            
             cursor.close()
-            connection.close()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
+            customer = cursor.fetchone()
+            
+            if not customer:
+                return jsonify({'error': 'Customer not found'}), 404
+            
+            return jsonify(customer), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/customers/<int:customer_id>', methods=['DELETE'])
 def delete_customer(customer_id):
     """Delete a customer"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM customers WHERE customer_id = %s", (customer_id,))
-        connection.commit()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Customer not found'}), 404
-        
-        return jsonify({'message': 'Customer deleted successfully'}), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM customers WHERE customer_id = %s", (customer_id,))
+            connection.commit()
+            
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Customer not found'}), 404
+            
+            return jsonify({'message': 'Customer deleted successfully'}), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 # ==================== SALES ENDPOINTS ====================
 
+def sales_list_query(search, status, after, keyset, limit, page):
+    """SQL for one page of /api/sales; returns (query, params, from_sql, count_params).
+
+    from_sql and count_params describe the unpaged result for count_rows.
+    """
+    where_clauses = []
+    params = []
+    
+    if search:
+        where_clauses.append("(c.name LIKE %s OR s.sale_id = %s)")
+        search_pattern = f'%{search}%'
+        params.extend([search_pattern, search if search.isdigit() else -1])
+    
+    if status:
+        where_clauses.append("s.status = %s")
+        params.append(status)
+    
+    where_sql = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+    from_sql = f"FROM sales s LEFT JOIN customers c ON s.customer_id = c.customer_id {where_sql}"
+    
+    page_clauses = list(where_clauses)
+    page_params = list(params)
+    if after:
+        # Seek past the last row of the previous page instead of
+        # scanning and discarding every row before an OFFSET
+        seek_sql, seek_params = keyset_before(['s.sale_date', 's.created_at', 's.sale_id'], after)
+        page_clauses.append(seek_sql)
+        page_params.extend(seek_params)
+    page_where_sql = "WHERE " + " AND ".join(page_clauses) if page_clauses else ""
+    
+    # Fetch one extra row to know whether another page exists
+    page_params.append(limit + 1)
+    offset_sql = ""
+    if not keyset:
+        offset_sql = "OFFSET %s"
+        page_params.append((page - 1) * limit)
+    
+    query = f"""
+        SELECT s.*, c.name as customer_name, c.email as customer_email
+        FROM sales s
+        LEFT JOIN customers c ON s.customer_id = c.customer_id
+        {page_where_sql}
+        ORDER BY s.sale_date DESC, s.created_at DESC, s.sale_id DESC
+        LIMIT %s {offset_sql}
+    """
+    return query, page_params, from_sql, params
+
+
+def sales_page(sales, limit, columns=None):
+    """Trim the look-ahead row off a page; returns (sales, next_cursor).
+
+    Pass the column names when the rows are tuples rather than dicts.
+    """
+    next_cursor = None
+    if len(sales) > limit:
+        sales = sales[:limit]
+        last = sales[-1] if columns is None else dict(zip(columns, sales[-1]))
+        next_cursor = encode_cursor([last['sale_date'], last['created_at'], last['sale_id']])
+    return sales, next_cursor
+
+
 @app.route('/api/sales', methods=['GET'])
 def get_sales():
-    """Get all sales with optional filters"""
+    """Get all sales with optional filters.
+
+    Pass ``cursor`` (empty for the first page, then the returned
+    ``next_cursor``) to page by keyset instead of ``page``; ``count``
+    selects an exact, estimated or omitted total. ``format=columnar|msgpack``
+    returns the page as columns and row arrays, with the same ``total``
+    and ``next_cursor``.
+    """
     search = request.args.get('search', '')
     status = request.args.get('status', '')
     limit = request.args.get('limit', 50, type=int)
     page = request.args.get('page', 1, type=int)
+    keyset = 'cursor' in request.args
+    count_mode = request.args.get('count', 'none' if keyset else 'exact')
     
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    if count_mode not in COUNT_MODES:
+        return jsonify({'error': f'count must be one of: {", ".join(COUNT_MODES)}'}), 400
     
-    try:
-        cursor = connection.cursor(dictionary=True)
-        offset = (page - 1) * limit
-        
-        where_clauses = []
-        params = []
-        
-        if search:
-            where_clauses.append("(c.name LIKE %s OR s.sale_id = %s)")
-            search_pattern = f'%{search}%'
-            params.extend([search_pattern, search if search.isdigit() else -1])
-        
-        if status:
-            where_clauses.append("s.status = %s")
-            params.append(status)
-        
-        where_sql = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
-        
-        query = f"""
-            SELECT s.*, c.name as customer_name, c.email as customer_email,
-                   (SELECT COUNT(*) FROM sale_items WHERE sale_id = s.sale_id) as item_count
-            FROM sales s
-            LEFT JOIN customers c ON s.customer_id = c.customer_id
-            {where_sql}
-            ORDER BY s.sale_date DESC, s.created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        sales = cursor.fetchall()
-        
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM sales s LEFT JOIN customers c ON s.customer_id = c.customer_id {where_sql}"
-        cursor.execute(count_query, params[:-2])
-        total = cursor.fetchone()['total']
-        
-        for sale in sales:
-            sale['sale_date'] = serialize_date(sale.get('sale_date'))
-            sale['created_at'] = serialize_datetime(sale.get('created_at'))
-            sale['updated_at'] = serialize_datetime(sale.get('updated_at'))
-            sale['total_amount'] = float(sale['total_amount'])
+    fmt = request.args.get('format', 'rows')
+    problem = check_list_format(fmt)
+    if problem:
+        return jsonify({'error': problem[0]}), problem[1]
+    
+    after = None
+    if keyset and request.args['cursor']:
+        after = decode_cursor(request.args['cursor'], 3)
+        if after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify({'items': sales, 'total': total}), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            query, page_params, from_sql, params = sales_list_query(search, status, after, keyset, limit, page)
+            
+            if fmt != 'rows':
+                cursor = connection.cursor()
+                cursor.execute(query, page_params)
+                columns = column_names(cursor)
+                sales, next_cursor = sales_page(cursor.fetchall(), limit, columns)
+                total = count_rows(connection.cursor(dictionary=True), from_sql, params, count_mode)
+                return columnar_response(columns, sales, fmt, total=total, next_cursor=next_cursor), 200
+            
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, page_params)
+            sales, next_cursor = sales_page(cursor.fetchall(), limit)
+            
+            # Get total count
+            total = count_rows(cursor, from_sql, params, count_mode)
+            
+            return jsonify({'items': sales, 'total': total, 'next_cursor': next_cursor}), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/sales/<int:sale_id>', methods=['GET'])
 def get_sale(sale_id):
     """Get a specific sale with items"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT s.*, c.name as customer_name, c.email as customer_email
-            FROM sales s
-            LEFT JOIN customers c ON s.customer_id = c.customer_id
-            WHERE s.sale_id = %s
-        """, (sale_id,))
-        sale = cursor.fetchone()
-        
-        if not sale:
-            return jsonify({'error': 'Sale not found'}), 404
-        
-        # Get sale items
-        cursor.execute("""
-            SELECT si.*, m.name as medicine_name, m.company
-            FROM sale_items si
-            JOIN medicines m ON si.medicine_id = m.medicine_id
-            WHERE si.sale_id = %s
-        """, (sale_id,))
-        items = cursor.fetchall()
-        
-        for item in items:
-            item['unit_price'] = float(item['unit_price'])
-            item['subtotal'] = float(item['subtotal'])
-        
-        sale['items'] = items
-        sale['sale_date'] = serialize_date(sale.get('sale_date'))
-        sale['created_at'] = serialize_datetime(sale.get('created_at'))
-        sale['updated_at'] = serialize_datetime(sale.get('updated_at'))
-        sale['total_amount'] = float(sale['total_amount'])
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify(sale), 200
-    except Error as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT s.*, c.name as customer_name, c.email as customer_email
+                FROM sales s
+                LEFT JOIN customers c ON s.customer_id = c.customer_id
+                WHERE s.sale_id = %s
+            """, (sale_id,))
+            sale = cursor.fetchone()
+            
+            if not sale:
+                return jsonify({'error': 'Sale not found'}), 404
+            
+            # Get sale items
+            cursor.execute("""
+                SELECT si.*, m.name as medicine_name, m.company
+                FROM sale_items si
+                JOIN medicines m ON si.medicine_id = m.medicine_id
+                WHERE si.sale_id = %s
+            """, (sale_id,))
+            items = cursor.fetchall()
+            
+            sale['items'] = items
+            
+            return jsonify(sale), 200
+        except Error as e:
+            return jsonify({'error': str(e)}), 500
+
+
+def replay_response(stored, fingerprint):
+    """Response for a request whose Idempotency-Key was already used"""
+    status_code, response_body, request_hash = stored
+    if request_hash != fingerprint:
+        return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+    if status_code is None:
+        return jsonify({'error': f'The request with this {IDEMPOTENCY_HEADER} is still in progress'}), 409
+    response = app.response_class(response_body, status=status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
 
 
 @app.route('/api/sales', methods=['POST'])
+@response_cache.invalidates('medicines')
 def add_sale():
-    """Add a new sale with items"""
+    """Add a new sale with items.
+
+    Stock for every line is decremented in one guarded UPDATE; if any
+    medicine lacks stock the whole sale is rolled back with a 409.
+    With an ``Idempotency-Key`` header a retry of a sale that was booked
+    gets the original 201 response back (marked ``Idempotent-Replayed``)
+    instead of booking it again.
+    """
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+    
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    items = data.get('items', [])
     
+    # Validate items and total the requested quantity per medicine
+    requested = {}
     try:
-        cursor = connection.cursor()
-        
-        # Insert sale
-        sale_query = """
-            INSERT INTO sales (customer_id, sale_date, total_amount, status, notes)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(sale_query, (
-            data.get('customer_id'),
-            data.get('sale_date'),
-            data.get('total_amount'),
-            data.get('status', 'completed'),
-            data.get('notes')
-        ))
-        sale_id = cursor.lastrowid
-        
-        # Insert sale items and update medicine quantities
-        items = data.get('items', [])
         for item in items:
-            # Insert sale item
-            item_query = """
-                INSERT INTO sale_items (sale_id, medicine_id, quantity, unit_price, subtotal)
-                VALUES (%s, %s, %s, %s, %s)
+            quantity = int(item['quantity'])
+            if quantity <= 0:
+                return jsonify({'error': 'Item quantity must be positive'}), 400
+            medicine_id = int(item['medicine_id'])
+            unit_price = float(item['unit_price'])
+            subtotal = float(item['subtotal'])
+            if unit_price < 0 or subtotal < 0:
+                return jsonify({'error': 'Item prices must not be negative'}), 400
+            requested[medicine_id] = requested.get(medicine_id, 0) + quantity
+            item['quantity'] = quantity
+            item['medicine_id'] = medicine_id
+            item['unit_price'] = unit_price
+            item['subtotal'] = subtotal
+    except KeyError as e:
+        return jsonify({'error': f'Missing required item field: {e.args[0]}'}), 400
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid numeric value'}), 400
+    
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        try:
+            cursor = connection.cursor()
+            if idempotency_key:
+                # Locks the key until this transaction ends, so a concurrent
+                # retry waits here and then replays the committed result
+                fingerprint = request_fingerprint(request.get_data())
+                stored = idempotency_keys.reserve(cursor, 'POST /api/sales', idempotency_key, fingerprint)
+                if stored:
+                    connection.rollback()
+                    return replay_response(stored, fingerprint)
+            
+            before = stock_snapshot(connection, requested, lock=True)
+            
+            # Decrement stock for all lines at once; the WHERE guard skips any
+            # medicine without enough stock, which shows up in rowcount
+            if requested:
+                stock_rows = " UNION ALL ".join(
+                    ["SELECT %s AS medicine_id, %s AS quantity"] + ["SELECT %s, %s"] * (len(requested) - 1)
+                )
+                params = [value for pair in requested.items() for value in pair]
+                cursor.execute(f"""
+                    UPDATE medicines m
+                    JOIN ({stock_rows}) req ON req.medicine_id = m.medicine_id
+                    SET m.quantity = m.quantity - req.quantity
+                    WHERE m.quantity >= req.quantity
+                """, params)
+                
+                if cursor.rowcount != len(requested):
+                    connection.rollback()
+                    placeholders = ", ".join(["%s"] * len(requested))
+                    cursor.execute(
+                        f"SELECT medicine_id, quantity FROM medicines WHERE medicine_id IN ({placeholders})",
+                        list(requested)
+                    )
+                    available = dict(cursor.fetchall())
+                    shortages = [
+                        {'medicine_id': medicine_id, 'requested': quantity,
+                         'available': available.get(medicine_id)}
+                        for medicine_id, quantity in requested.items()
+                        if available.get(medicine_id, 0) < quantity
+                    ]
+                    return jsonify({'error': 'Insufficient stock', 'items': shortages}), 409
+            
+            # Insert sale
+            sale_query = """
+                INSERT INTO sales (customer_id, sale_date, total_amount, status, notes, item_count)
+                VALUES (%s, %s, %s, %s, %s, %s)
             """
-            cursor.execute(item_query, (
-                sale_id,
-                item['medicine_id'],
-                item['quantity'],
-                item['unit_price'],
-                item['subtotal']
+            cursor.execute(sale_query, (
+                data.get('customer_id'),
+                data.get('sale_date'),
+                data.get('total_amount'),
+                data.get('status', 'completed'),
+                data.get('notes'),
+                len(items)
             ))
+            sale_id = cursor.lastrowid
             
-            # Update medicine quantity
-            cursor.execute("""
-                UPDATE medicines
-                SET quantity = quantity - %s
-                WHERE medicine_id = %s AND quantity >= %s
-            """, (item['quantity'], item['medicine_id'], item['quantity']))
-        
-        connection.commit()
-        
-        # Return created sale
-        cursor.close()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT s.*, c.name as customer_name
-            FROM sales s
-            LEFT JOIN customers c ON s.customer_id = c.customer_id
-            WHERE s.sale_id = %s
-        """, (sale_id,))
-        sale = cursor.fetchone()
-        sale['sale_date'] = serialize_date(sale.get('sale_date'))
-        sale['total_amount'] = float(sale['total_amount'])
-        
-        return jsonify(sale), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
+            # Insert all sale items in one multi-row INSERT
+            if items:
+                cursor.executemany("""
+                    INSERT INTO sale_items (sale_id, medicine_id, quantity, unit_price, subtotal)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, [
+                    (sale_id, item['medicine_id'], item['quantity'], item['unit_price'], item['subtotal'])
+                    for item in items
+                ])
+            
+            # Fold the sale into the daily report rollups
+            apply_sale(cursor, sale_id)
+            
+            # Read back the created sale before committing, so the response
+            # is stored with the idempotency key in the same transaction
             cursor.close()
-            connection.close()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT s.*, c.name as customer_name
+                FROM sales s
+                LEFT JOIN customers c ON s.customer_id = c.customer_id
+                WHERE s.sale_id = %s
+            """, (sale_id,))
+            response = jsonify(cursor.fetchone())
+            if idempotency_key:
+                idempotency_keys.complete(cursor, 'POST /api/sales', idempotency_key, 201,
+                                          response.get_data(as_text=True))
+            
+            connection.commit()
+            record_inventory_change(connection, before, adjust_stock(before, {m: -q for m, q in requested.items()}))
+            publish_events(connection, [('sale', {
+                'sale_id': sale_id, 'action': 'created', 'total_amount': data.get('total_amount')
+            })])
+            
+            if idempotency_key and idempotency_keys.claim_sweep():
+                idempotency_keys.sweep(connection)
+            
+            return response, 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/sales/<int:sale_id>', methods=['PUT'])
 def update_sale(sale_id):
     """Update a sale"""
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        query = """
-            UPDATE sales
-            SET customer_id = %s, sale_date = %s, total_amount = %s, status = %s, notes = %s
-            WHERE sale_id = %s
-        """
-        cursor.execute(query, (
-            data.get('customer_id'),
-            data.get('sale_date'),
-            data.get('total_amount'),
-            data.get('status'),
-            data.get('notes'),
-            sale_id
-        ))
-        connection.commit()
-        
-        cursor.close()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM sales WHERE sale_id = %s", (sale_id,))
-        sale = cursor.fetchone()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        if not sale:
-            return jsonify({'error': 'Sale not found'}), 404
-        
-        sale['sale_date'] = serialize_date(sale.get('sale_date'))
-        sale['total_amount'] = float(sale['total_amount'])
-        
-        return jsonify(sale), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
+        try:
+            cursor = connection.cursor()
+            
+            # Swap the old figures for the new ones in the report rollups
+            apply_sale(cursor, sale_id, sign=-1)
+            query = """
+                UPDATE sales
+                SET customer_id = %s, sale_date = %s, total_amount = %s, status = %s, notes = %s
+                WHERE sale_id = %s
+            """
+            cursor.execute(query, (
+                data.get('customer_id'),
+                data.get('sale_date'),
+                data.get('total_amount'),
+                data.get('status'),
+                data.get('notes'),
+                sale_id
+            ))
+            apply_sale(cursor, sale_id)
+            connection.commit()
+            
             cursor.close()
-            connection.close()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM sales WHERE sale_id = %s", (sale_id,))
+            sale = cursor.fetchone()
+            
+            if not sale:
+                return jsonify({'error': 'Sale not found'}), 404
+            
+            publish_events(connection, [('sale', {
+                'sale_id': sale_id, 'action': 'updated', 'total_amount': sale['total_amount']
+            })])
+            return jsonify(sale), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/sales/<int:sale_id>', methods=['DELETE'])
+@response_cache.invalidates('medicines')
 def delete_sale(sale_id):
     """Delete a sale (and restore medicine quantities)"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Get sale items to restore quantities
-        cursor.execute("""
-            SELECT medicine_id, quantity FROM sale_items WHERE sale_id = %s
-        """, (sale_id,))
-        items = cursor.fetchall()
+    with db_connection() as connection:
+        if not connection:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        # Restore medicine quantities
-        for item in items:
+        try:
+            cursor = connection.cursor()
+            
+            # Get sale items to restore quantities
             cursor.execute("""
-                UPDATE medicines SET quantity = quantity + %s WHERE medicine_id = %s
-            """, (item[1], item[0]))
-        
-        # Delete sale (cascade will delete sale_items)
-        cursor.execute("DELETE FROM sales WHERE sale_id = %s", (sale_id,))
-        connection.commit()
-        
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Sale not found'}), 404
-        
-        return jsonify({'message': 'Sale deleted successfully'}), 200
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+                SELECT medicine_id, quantity FROM sale_items WHERE sale_id = %s
+            """, (sale_id,))
+            items = cursor.fetchall()
+            restored = {}
+            for medicine_id, quantity in items:
+                restored[medicine_id] = restored.get(medicine_id, 0) + quantity
+            before = stock_snapshot(connection, restored, lock=True)
+            
+            # Restore medicine quantities
+            for item in items:
+                cursor.execute("""
+                    UPDATE medicines SET quantity = quantity + %s WHERE medicine_id = %s
+                """, (item[1], item[0]))
+            
+            # Remove the sale from the report rollups
+            apply_sale(cursor, sale_id, sign=-1)
+            
+            # Delete sale (cascade will delete sale_items)
+            cursor.execute("DELETE FROM sales WHERE sale_id = %s", (sale_id,))
+            connection.commit()
+            
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Sale not found'}), 404
+            
+            record_inventory_change(connection, before, adjust_stock(before, restored))
+            publish_events(connection, [('sale', {'sale_id': sale_id, 'action': 'deleted', 'total_amount': None})])
+            return jsonify({'message': 'Sale deleted successfully'}), 200
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 500
 
 
 # ==================== REPORTS ENDPOINTS ====================
 
+# Independent queries behind /api/reports/summary, keyed by result name
+REPORT_QUERIES = {
+    # Completed sales per day since the earlier of the month start and
+    # the trend window, read from the daily rollup (at most ~38 rows);
+    # today, month and trend totals all derive from it
+    'daily_sales': """
+        SELECT sale_date as date, total_amount as total,
+               CURDATE() as today
+        FROM daily_sales_rollup
+        WHERE sale_date >= LEAST(DATE_SUB(CURDATE(), INTERVAL 7 DAY),
+                                 DATE_FORMAT(CURDATE(), '%Y-%m-01'))
+        AND sale_count > 0
+        ORDER BY sale_date
+    """,
+    # Medicine counts in a single scan, with the customer count
+    # folded in as a scalar subquery
+    'counts': """
+        SELECT COUNT(*) as total_medicines,
+               COALESCE(SUM(quantity < 5), 0) as low_stock,
+               COALESCE(SUM(exp_date >= CURDATE()
+                            AND exp_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)), 0) as expiring_soon,
+               (SELECT COUNT(*) FROM customers) as total_customers
+        FROM medicines
+    """,
+    # Top selling medicines (last 30 days) from the per-medicine rollup
+    'top_medicines': """
+        SELECT m.name, m.company, SUM(r.quantity_sold) as total_sold, SUM(r.revenue) as revenue
+        FROM daily_medicine_sales_rollup r
+        JOIN medicines m ON r.medicine_id = m.medicine_id
+        WHERE r.sale_date >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+        GROUP BY m.medicine_id, m.name, m.company
+        HAVING total_sold > 0
+        ORDER BY total_sold DESC
+        LIMIT 10
+    """,
+}
+
+
+def build_report_summary(results):
+    """Assemble the summary payload from the rows of each REPORT_QUERIES entry"""
+    today_sales = 0.0
+    month_sales = 0.0
+    sales_trend = []
+    for day in results['daily_sales']:
+        today = day['today']
+        total = float(day['total'])
+        if day['date'] == today:
+            today_sales += total
+        if (day['date'].year, day['date'].month) == (today.year, today.month):
+            month_sales += total
+        if day['date'] >= today - timedelta(days=7):
+            sales_trend.append({'date': day['date'], 'total': total})
+    
+    counts = results['counts'][0]
+    
+    top_medicines = results['top_medicines']
+    for med in top_medicines:
+        med['total_sold'] = int(med['total_sold'])
+    
+    return {
+        'today_sales': today_sales,
+        'month_sales': month_sales,
+        'total_customers': counts['total_customers'],
+        'total_medicines': counts['total_medicines'],
+        'low_stock': int(counts['low_stock']),
+        'expiring_soon': int(counts['expiring_soon']),
+        'top_medicines': top_medicines,
+        'sales_trend': sales_trend
+    }
+
+
+def run_report_query(query):
+    """Run one report query on its own pooled connection; None if none was available"""
+    with db_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(query)
+        return cursor.fetchall()
+
+
 @app.route('/api/reports/summary', methods=['GET'])
 def get_report_summary():
-    """Get dashboard summary report"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
+    """Get dashboard summary report.
+
+    The report queries are independent, so they run side by side on
+    separate pooled connections and the endpoint takes about as long as
+    the slowest one. Each sees its own snapshot, which is fine for a
+    dashboard but means the figures are not from one instant.
+    """
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Total sales today
-        cursor.execute("""
-            SELECT COALESCE(SUM(total_amount), 0) as total
-            FROM sales
-            WHERE DATE(sale_date) = CURDATE() AND status = 'completed'
-        """)
-        today_sales = float(cursor.fetchone()['total'])
-        
-        # Total sales this month
-        cursor.execute("""
-            SELECT COALESCE(SUM(total_amount), 0) as total
-            FROM sales
-            WHERE MONTH(sale_date) = MONTH(CURDATE())
-            AND YEAR(sale_date) = YEAR(CURDATE())
-            AND status = 'completed'
-        """)
-        month_sales = float(cursor.fetchone()['total'])
-        
-        # Total customers
-        cursor.execute("SELECT COUNT(*) as total FROM customers")
-        total_customers = cursor.fetchone()['total']
-        
-        # Total medicines
-        cursor.execute("SELECT COUNT(*) as total FROM medicines")
-        total_medicines = cursor.fetchone()['total']
-        
-        # Low stock count
-        cursor.execute("SELECT COUNT(*) as total FROM medicines WHERE quantity < 5")
-        low_stock = cursor.fetchone()['total']
-        
-        # Expiring soon count
-        cursor.execute("""
-            SELECT COUNT(*) as total FROM medicines
-            WHERE exp_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-            AND exp_date >= CURDATE()
-        """)
-        expiring_soon = cursor.fetchone()['total']
-        
-        # Top selling medicines (last 30 days)
-        cursor.execute("""
-            SELECT m.name, m.company, SUM(si.quantity) as total_sold, SUM(si.subtotal) as revenue
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.sale_id
-            JOIN medicines m ON si.medicine_id = m.medicine_id
-            WHERE s.sale_date >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
-            AND s.status = 'completed'
-            GROUP BY m.medicine_id, m.name, m.company
-            ORDER BY total_sold DESC
-            LIMIT 10
-        """)
-        top_medicines = cursor.fetchall()
-        for med in top_medicines:
-            med['total_sold'] = int(med['total_sold'])
-            med['revenue'] = float(med['revenue'])
-        
-        # Sales trend (last 7 days)
-        cursor.execute("""
-            SELECT DATE(sale_date) as date, SUM(total_amount) as total
-            FROM sales
-            WHERE sale_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-            AND status = 'completed'
-            GROUP BY DATE(sale_date)
-            ORDER BY date
-        """)
-        sales_trend = cursor.fetchall()
-        for trend in sales_trend:
-            trend['date'] = serialize_date(trend['date'])
-            trend['total'] = float(trend['total'])
-        
-        return jsonify({
-            'today_sales': today_sales,
-            'month_sales': month_sales,
-            'total_customers': total_customers,
-            'total_medicines': total_medicines,
-            'low_stock': low_stock,
-            'expiring_soon': expiring_soon,
-            'top_medicines': top_medicines,
-            'sales_trend': sales_trend
-        }), 200
+        # copy_context() lets the worker threads account to this request's profile
+        futures = {name: report_executor.submit(copy_context().run, run_report_query, query)
+                   for name, query in REPORT_QUERIES.items()}
+        results = {name: future.result() for name, future in futures.items()}
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    
+    if any(rows is None for rows in results.values()):
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    return jsonify(build_report_summary(results)), 200
 
 
 if __name__ == '__main__':
@@ -0,0 +1,339 @@
+"""
+Async (ASGI) serving mode for the Medical Storage Management System API
+The hot read endpoints run natively on an aiomysql pool, so one process
+keeps serving while queries are in flight; every other route is handed
+to the Flask app unchanged, so the API surface is identical.
+
+/ws/notifications also accepts WebSocket connections here, pushing the
+same events as the Flask Server-Sent Events stream without holding a
+thread per client. This is the endpoint the dashboard connects to.
+
+Run with:  uvicorn asgi:app --host 0.0.0.0 --port 5000
+(requires the packages in requirements-async.txt)
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from config import DB_CONFIG, DB_POOL_CONFIG, NOTIFICATION_CONFIG
+from json_provider import dumps, packb
+from notifications import OVERFLOW, Subscriber, parse_event_id
+from app import (
+    COUNT_MODES, LIST_FORMATS, MEDICINE_LIST_QUERY, REPORT_QUERIES, STREAM_BATCH_SIZE, STREAM_FORMATS,
+    app as flask_app, build_report_summary, check_list_format, db_connection as sync_db_connection, decode_cursor,
+    notification_feed, notification_hub, sales_list_query, sales_page, version_query, version_token,
+)
+
+
+class APIResponse(JSONResponse):
+    """JSON encoded by the same provider as the Flask app"""
+
+    def render(self, content):
+        return dumps(content).encode('utf-8')
+
+
+def error(message, status_code):
+    return APIResponse({'error': message}, status_code=status_code)
+
+
+db_pool = None
+
+
+@asynccontextmanager
+async def db_connection():
+    """Borrow a connection from the async pool; yields None if none is available.
+
+    Mirrors app.db_connection: waits at most DB_POOL_TIMEOUT seconds and
+    always rolls back before handing the connection back.
+    """
+    try:
+        connection = await asyncio.wait_for(db_pool.acquire(), DB_POOL_CONFIG['checkout_timeout'])
+    except (asyncio.TimeoutError, aiomysql.Error) as e:
+        print(f"Error connecting to MySQL: {e}")
+        yield None
+        return
+
+    try:
+        yield connection
+    finally:
+        try:
+            await connection.rollback()
+        except aiomysql.Error:
+            connection.close()
+        db_pool.release(connection)
+
+
+async def fetch_all(connection, query, params=None):
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        return list(await cursor.fetchall())
+
+
+async def fetch_columnar(connection, query, params=None):
+    """(column names, tuple rows) for a query"""
+    async with connection.cursor() as cursor:
+        await cursor.execute(query, params)
+        return [column[0] for column in cursor.description], list(await cursor.fetchall())
+
+
+def columnar_response(columns, rows, fmt, headers=None, **extra):
+    """Same body as app.columnar_response"""
+    body = {'columns': columns, 'rows': rows, **extra}
+    if fmt == 'msgpack':
+        return Response(packb(body), media_type=LIST_FORMATS['msgpack'], headers=headers)
+    return APIResponse(body, headers=headers)
+
+
+# ==================== NATIVE ASYNC ENDPOINTS ====================
+
+async def get_medicines(request):
+    """Async /api/medicines: same ETag handling and stream formats as the Flask route"""
+    stream = request.query_params.get('stream')
+    if stream is None and request.headers.get('accept', '').startswith(STREAM_FORMATS['ndjson']):
+        stream = 'ndjson'
+    if stream:
+        return await stream_medicines(stream)
+
+    fmt = request.query_params.get('format', 'rows')
+    problem = check_list_format(fmt)
+    if problem:
+        return error(*problem)
+
+    async with db_connection() as connection:
+        if not connection:
+            return error('Database connection failed', 500)
+
+        try:
+            async with connection.cursor() as cursor:
+                await cursor.execute(version_query(('medicines', 'suppliers')))
+                etag, last_modified = version_token(('medicines', 'suppliers'), await cursor.fetchall())
+
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+            if last_modified:
+                headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+            if f'"{etag}"' in request.headers.get('if-none-match', ''):
+                return Response(status_code=304, headers=headers)
+
+            if fmt != 'rows':
+                columns, rows = await fetch_columnar(connection, MEDICINE_LIST_QUERY)
+                return columnar_response(columns, rows, fmt, headers=headers)
+
+            medicines = await fetch_all(connection, MEDICINE_LIST_QUERY)
+            return APIResponse(medicines, headers=headers)
+        except aiomysql.Error as e:
+            return error(str(e), 500)
+
+
+async def stream_medicines(stream):
+    """Stream the medicine list from an unbuffered cursor, as the Flask route does"""
+    if stream not in STREAM_FORMATS:
+        return error(f'stream must be one of: {", ".join(STREAM_FORMATS)}', 400)
+
+    async def generate():
+        async with db_connection() as connection:
+            if not connection:
+                yield None
+                return
+            async with connection.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(MEDICINE_LIST_QUERY)
+                yield True  # query accepted: the caller can commit to a 200
+
+                first = True
+                if stream == 'json':
+                    yield '['
+                while True:
+                    rows = await cursor.fetchmany(STREAM_BATCH_SIZE)
+                    if not rows:
+                        break
+                    if stream == 'ndjson':
+                        yield '\n'.join(dumps(row) for row in rows) + '\n'
+                    else:
+                        yield ('' if first else ',') + dumps(list(rows))[1:-1]
+                    first = False
+                if stream == 'json':
+                    yield ']'
+
+    # Run up to the query first, so a missing connection or a failed query
+    # is still an error response (as in app.stream_query), not an empty 200
+    rows = generate()
+    try:
+        started = await rows.__anext__()
+    except aiomysql.Error as e:
+        await rows.aclose()
+        return error(str(e), 500)
+    if not started:
+        await rows.aclose()
+        return error('Database connection failed', 500)
+
+    return StreamingResponse(rows, media_type=STREAM_FORMATS[stream],
+                             headers={'X-Accel-Buffering': 'no'})
+
+
+async def get_sales(request):
+    """Async /api/sales with the same filters, pagination and count modes"""
+    args = request.query_params
+    search = args.get('search', '')
+    status = args.get('status', '')
+    try:
+        limit = int(args.get('limit', 50))
+        page = int(args.get('page', 1))
+    except ValueError:
+        limit, page = 50, 1
+    keyset = 'cursor' in args
+    count_mode = args.get('count', 'none' if keyset else 'exact')
+
+    if count_mode not in COUNT_MODES:
+        return error(f'count must be one of: {", ".join(COUNT_MODES)}', 400)
+
+    fmt = args.get('format', 'rows')
+    problem = check_list_format(fmt)
+    if problem:
+        return error(*problem)
+
+    after = None
+    if keyset and args['cursor']:
+        after = decode_cursor(args['cursor'], 3)
+        if after is None:
+            return error('Invalid cursor', 400)
+
+    async with db_connection() as connection:
+        if not connection:
+            return error('Database connection failed', 500)
+
+        try:
+            query, page_params, from_sql, params = sales_list_query(search, status, after, keyset, limit, page)
+            columns = None
+            if fmt != 'rows':
+                columns, rows = await fetch_columnar(connection, query, page_params)
+                sales, next_cursor = sales_page(rows, limit, columns)
+            else:
+                sales, next_cursor = sales_page(await fetch_all(connection, query, page_params), limit)
+
+            total = None
+            if count_mode == 'estimate':
+                plan = await fetch_all(connection, f"EXPLAIN SELECT 1 {from_sql}", params)
+                total = 0
+                if plan:
+                    total = int((plan[0].get('rows') or 0) * float(plan[0].get('filtered') or 100) / 100)
+            elif count_mode == 'exact':
+                total = (await fetch_all(connection, f"SELECT COUNT(*) as total {from_sql}", params))[0]['total']
+
+            if columns:
+                return columnar_response(columns, sales, fmt, total=total, next_cursor=next_cursor)
+            return APIResponse({'items': sales, 'total': total, 'next_cursor': next_cursor})
+        except aiomysql.Error as e:
+            return error(str(e), 500)
+
+
+async def run_report_query(query):
+    """Run one report query on its own pooled connection; None if none was available"""
+    async with db_connection() as connection:
+        if not connection:
+            return None
+        return await fetch_all(connection, query)
+
+
+async def get_report_summary(request):
+    """Async /api/reports/summary: the report queries run concurrently, as in the Flask route"""
+    try:
+        rows = await asyncio.gather(*(run_report_query(query) for query in REPORT_QUERIES.values()))
+    except aiomysql.Error as e:
+        return error(str(e), 500)
+
+    if any(result is None for result in rows):
+        return error('Database connection failed', 500)
+    return APIResponse(build_report_summary(dict(zip(REPORT_QUERIES, rows))))
+
+
+# ==================== PUSH NOTIFICATIONS ====================
+
+class WebSocketSubscriber(Subscriber):
+    """Subscriber fed from publishing threads into the event loop"""
+
+    def __init__(self, loop, max_pending):
+        super().__init__(max_pending)
+        self._loop = loop
+        self._events = asyncio.Queue()
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        if self._events.qsize() >= self.max_pending:
+            self.overflowed = True
+            event = OVERFLOW
+        self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    async def next_event(self, timeout):
+        try:
+            return await asyncio.wait_for(self._events.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+async def notifications_socket(websocket):
+    """WebSocket flavour of /ws/notifications: one JSON event per message"""
+    await websocket.accept()
+    last_event_id = parse_event_id(websocket.query_params.get('last_event_id'))
+    notification_feed.ensure_running(sync_db_connection)
+    subscriber = notification_hub.subscribe(
+        WebSocketSubscriber(asyncio.get_running_loop(), NOTIFICATION_CONFIG['max_pending']), last_event_id
+    )
+    try:
+        while True:
+            event = await subscriber.next_event(NOTIFICATION_CONFIG['heartbeat'])
+            if event is OVERFLOW:
+                # 1013 "try again later": the client reconnects with last_event_id
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(dumps(event or {'type': 'heartbeat'}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        notification_hub.unsubscribe(subscriber)
+
+
+# ==================== APPLICATION ====================
+
+@asynccontextmanager
+async def lifespan(_app):
+    global db_pool
+    db_pool = await aiomysql.create_pool(
+        host=DB_CONFIG['host'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'],
+        charset=DB_CONFIG['charset'],
+        autocommit=DB_CONFIG['autocommit'],
+        minsize=1,
+        maxsize=DB_POOL_CONFIG['pool_size'],
+        pool_recycle=DB_POOL_CONFIG['recycle'],
+    )
+    try:
+        yield
+    finally:
+        db_pool.close()
+        await db_pool.wait_closed()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/medicines', get_medicines, methods=['GET']),
+        Route('/api/sales', get_sales, methods=['GET']),
+        Route('/api/reports/summary', get_report_summary, methods=['GET']),
+        WebSocketRoute('/ws/notifications', notifications_socket),
+        # Everything else (including writes to the paths above) runs on
+        # the Flask app in a worker thread
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,149 @@
+"""
+Bulk medicine import for POST /api/medicines/bulk
+Reads a CSV or NDJSON body incrementally, validates it in chunks and
+inserts each chunk with a single multi-row INSERT, collecting per-row
+errors instead of failing the whole upload.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+from config import BULK_IMPORT_CONFIG
+
+IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+
+IMPORT_FIELDS = ('name', 'company', 'mfg_date', 'exp_date', 'quantity', 'price')
+
+INSERT_MEDICINE = """
+    INSERT INTO medicines (name, company, mfg_date, exp_date, quantity, price, supplier_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def import_format(mimetype, requested=None):
+    """'csv' or 'ndjson' from ?format= or the Content-Type, else None"""
+    if requested:
+        return requested if requested in IMPORT_FORMATS.values() else None
+    return IMPORT_FORMATS.get(mimetype)
+
+
+def iter_rows(stream, fmt):
+    """Yield (line_no, row) pairs from a binary body without reading it all.
+
+    Rows that cannot be decoded are yielded as (line_no, ValueError) so
+    they show up in the report like any other invalid row.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, ValueError('Invalid JSON')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, ValueError('Each line must be a JSON object')
+            continue
+        yield line_no, row
+
+
+def chunked(rows, size=None):
+    """Group an iterator of rows into lists of at most size rows"""
+    size = size or BULK_IMPORT_CONFIG['chunk_size']
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def validate_row(row):
+    """Check one row; returns (values, supplier_ref, None) or (None, None, error).
+
+    values lacks the supplier_id, which is filled in once the chunk's
+    supplier references are resolved. supplier_ref is ('id', int) or
+    ('name', str).
+    """
+    if isinstance(row, Exception):
+        return None, None, str(row)
+
+    row = {key.strip() if isinstance(key, str) else key: _text(value) for key, value in row.items()}
+    for field in IMPORT_FIELDS:
+        if row.get(field) in (None, ''):
+            return None, None, f'Missing required field: {field}'
+
+    try:
+        mfg_date = datetime.strptime(str(row['mfg_date']), '%Y-%m-%d').date()
+        exp_date = datetime.strptime(str(row['exp_date']), '%Y-%m-%d').date()
+    except ValueError:
+        return None, None, 'Dates must be YYYY-MM-DD'
+    if exp_date < mfg_date:
+        return None, None, 'exp_date is before mfg_date'
+
+    try:
+        quantity = int(row['quantity'])
+        price = float(row['price'])
+    except (ValueError, TypeError):
+        return None, None, 'Invalid numeric value'
+    if quantity < 0:
+        return None, None, 'Quantity must be non-negative'
+    if price < 0:
+        return None, None, 'Price must be non-negative'
+
+    if row.get('supplier_id') not in (None, ''):
+        try:
+            supplier_ref = ('id', int(row['supplier_id']))
+        except (ValueError, TypeError):
+            return None, None, 'Invalid supplier_id'
+    elif row.get('supplier_name'):
+        # Supplier names compare case-insensitively, as in the database collation
+        supplier_ref = ('name', str(row['supplier_name']).lower())
+    else:
+        return None, None, 'Missing required field: supplier_id or supplier_name'
+
+    values = [str(row['name']), str(row['company']), mfg_date, exp_date, quantity, price]
+    return values, supplier_ref, None
+
+
+def resolve_suppliers(cursor, refs, known):
+    """Look up supplier ids and names not yet in known with one query.
+
+    known maps ('id', n) / ('name', s) to a supplier_id and is carried
+    across chunks, so a catalogue from a handful of suppliers costs one
+    lookup for the first chunk and none after that.
+    """
+    ids = sorted({value for kind, value in refs if kind == 'id' and (kind, value) not in known})
+    names = sorted({value for kind, value in refs if kind == 'name' and (kind, value) not in known})
+    if not ids and not names:
+        return
+
+    conditions, params = [], []
+    if ids:
+        conditions.append(f"supplier_id IN ({', '.join(['%s'] * len(ids))})")
+        params.extend(ids)
+    if names:
+        conditions.append(f"supplier_name IN ({', '.join(['%s'] * len(names))})")
+        params.extend(names)
+    cursor.execute(
+        f"SELECT supplier_id, supplier_name FROM suppliers WHERE {' OR '.join(conditions)}",
+        params
+    )
+    for supplier_id, supplier_name in cursor.fetchall():
+        known[('id', supplier_id)] = supplier_id
+        # First match wins if two suppliers share a name
+        known.setdefault(('name', supplier_name.lower()), supplier_id)
@@ -0,0 +1,111 @@
+"""
+Bulk partial updates for PATCH /api/medicines/bulk
+Validates a batch of per-medicine changes and applies them with one
+CASE-batched UPDATE per chunk, so a nightly reconciliation of thousands
+of rows is a handful of statements in a single transaction.
+"""
+
+from datetime import datetime
+
+from config import BULK_IMPORT_CONFIG
+
+# Column -> parser for the fields a bulk update may set
+UPDATE_FIELDS = {
+    'name': str,
+    'company': str,
+    'mfg_date': lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+    'exp_date': lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+    'quantity': int,
+    'price': float,
+    'supplier_id': int,
+}
+
+
+def parse_timestamp(value):
+    """Parse an updated_at value as sent back by the API ('YYYY-MM-DD HH:MM:SS')"""
+    return datetime.fromisoformat(str(value)).replace(microsecond=0, tzinfo=None)
+
+
+def validate_update(entry):
+    """Check one update; returns (medicine_id, changes, expected_updated_at, error).
+
+    changes maps a column to its new value, except 'quantity_delta',
+    which is added to the stored quantity instead of replacing it.
+    """
+    if not isinstance(entry, dict):
+        return None, None, None, 'Each update must be an object'
+
+    try:
+        medicine_id = int(entry['medicine_id'])
+    except (KeyError, ValueError, TypeError):
+        return None, None, None, 'Missing or invalid medicine_id'
+
+    changes = {}
+    for field in (*UPDATE_FIELDS, 'quantity_delta'):
+        if field not in entry:
+            continue
+        parse = UPDATE_FIELDS.get(field, int)
+        try:
+            if entry[field] is None:
+                raise ValueError(field)
+            changes[field] = parse(entry[field])
+        except (ValueError, TypeError):
+            return medicine_id, None, None, f'Invalid value for {field}'
+
+    if not changes:
+        return medicine_id, None, None, 'No fields to update'
+    if 'quantity' in changes and 'quantity_delta' in changes:
+        return medicine_id, None, None, 'Send quantity or quantity_delta, not both'
+    if changes.get('quantity', 0) < 0:
+        return medicine_id, None, None, 'Quantity must be non-negative'
+    if changes.get('price', 0) < 0:
+        return medicine_id, None, None, 'Price must be non-negative'
+    for field in ('name', 'company'):
+        if field in changes and not changes[field].strip():
+            return medicine_id, None, None, f'{field} must not be empty'
+
+    expected = None
+    if entry.get('updated_at') is not None:
+        try:
+            expected = parse_timestamp(entry['updated_at'])
+        except ValueError:
+            return medicine_id, None, None, 'Invalid updated_at'
+
+    return medicine_id, changes, expected, None
+
+
+def case_update(updates):
+    """Build one UPDATE that applies every change in updates.
+
+    updates is a list of (medicine_id, changes). Each column touched by
+    any of them gets a CASE over medicine_id; rows that do not set that
+    column keep their value through the ELSE branch.
+    """
+    clauses, params = [], []
+    for column in UPDATE_FIELDS:
+        whens, when_params = [], []
+        for medicine_id, changes in updates:
+            if column in changes:
+                whens.append('WHEN %s THEN %s')
+                when_params.extend((medicine_id, changes[column]))
+            elif column == 'quantity' and 'quantity_delta' in changes:
+                whens.append('WHEN %s THEN quantity + %s')
+                when_params.extend((medicine_id, changes['quantity_delta']))
+        if whens:
+            clauses.append(f"{column} = CASE medicine_id {' '.join(whens)} ELSE {column} END")
+            params.extend(when_params)
+
+    ids = [medicine_id for medicine_id, _ in updates]
+    query = f"""
+        UPDATE medicines
+        SET {', '.join(clauses)}
+        WHERE medicine_id IN ({', '.join(['%s'] * len(ids))})
+    """
+    return query, params + ids
+
+
+def update_batches(updates, size=None):
+    """Split updates into CASE statements of at most size rows"""
+    size = size or BULK_IMPORT_CONFIG['chunk_size']
+    for start in range(0, len(updates), size):
+        yield case_update(updates[start:start + size])
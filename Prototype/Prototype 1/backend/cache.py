@@ -0,0 +1,154 @@
+"""
+In-process response cache for read-heavy endpoints
+Bounded LRU with per-route TTLs; entries are tagged with the tables they
+were built from so mutating routes can drop exactly what they affect.
+
+The cache lives in each worker process. A write handled by one worker
+invalidates only that worker's entries; the others catch up when their
+TTL expires, so keep TTLs short for data that must look fresh everywhere.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+# Response headers stored with a cached body so hits can still revalidate
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of rendered responses"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+                       'stale_discards': 0}
+        self._routes = {}  # route name -> {'hits': n, 'misses': n}
+        self._generations = {}  # tag -> number of times it was invalidated
+
+    def _count(self, route, outcome):
+        self._stats[outcome] += 1
+        self._routes.setdefault(route, {'hits': 0, 'misses': 0})[outcome] += 1
+
+    def get(self, key, route=None):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._count(route, 'misses')
+                return None
+            self._entries.move_to_end(key)
+            self._count(route, 'hits')
+            return entry[1]
+
+    def generations(self, tags):
+        """Snapshot of the invalidation counters of tags, to pass to set"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags=(), generations=None):
+        """Store a value for ttl seconds, evicting the least recently used entry if full.
+
+        With generations (taken by generations(tags) before the value was
+        read from the database), the value is dropped instead if any of
+        its tags was invalidated since: it may predate that write.
+        """
+        with self._lock:
+            if generations is not None and generations != tuple(self._generations.get(tag, 0) for tag in tags):
+                self._stats['stale_discards'] += 1
+                return
+            self._entries[key] = (time.monotonic() + ttl, value, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry built from any of the given tables"""
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tags]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters overall and per route"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['routes'] = {route: dict(counts) for route, counts in self._routes.items()}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def cached(self, *tags, ttl, bypass=None):
+        """Decorator: serve a GET view from the cache, keyed on path and query string.
+
+        bypass, if given, is called per request; when it returns something
+        truthy (e.g. a streamed format negotiated through Accept, which the
+        key does not capture) the view runs uncached. Such views answer
+        with Vary: Accept.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                response = make_response(cached_view(*args, **kwargs))
+                if bypass is not None:
+                    response.vary.add('Accept')
+                return response
+
+            def cached_view(*args, **kwargs):
+                if self.max_entries <= 0 or ttl <= 0 or (bypass is not None and bypass()):
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                cached = self.get(key, view.__name__)
+                if cached is not None:
+                    body, mimetype, headers = cached
+                    response = make_response(body, 200)
+                    response.mimetype = mimetype
+                    response.headers.extend(headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    # Answers 304 if the client already holds this version
+                    return response.make_conditional(request)
+
+                # Taken before the view reads, so a write that invalidates
+                # while it runs keeps this (possibly older) response out
+                generations = self.generations(tags)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    headers = [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+                    self.set(key, (response.get_data(), response.mimetype, headers), ttl, tags, generations)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidates(self, *tags):
+        """Decorator: drop entries for the given tables after a successful write"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                response = make_response(view(*args, **kwargs))
+                if response.status_code < 400:
+                    self.invalidate(*tags)
+                return response
+            return wrapper
+        return decorator
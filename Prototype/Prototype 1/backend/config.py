@@ -20,10 +20,115 @@ DB_CONFIG = {
     'autocommit': False
 }
 
-# Flask Configuration
+# Connection Pool Configuration
+DB_POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+    'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    'ping_interval': int(os.getenv('DB_POOL_PING_INTERVAL', 30)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600))
+}
+
+# Search Configuration
+SEARCH_CONFIG = {
+    # Must match the server's innodb_ft_min_token_size
+    'min_token_size': int(os.getenv('SEARCH_MIN_TOKEN_SIZE', 3)),
+    'default_limit': int(os.getenv('SEARCH_DEFAULT_LIMIT', 50)),
+    'max_limit': int(os.getenv('SEARCH_MAX_LIMIT', 500))
+}
+
+# Response Cache Configuration (per-process; TTLs in seconds, 0 disables a route)
+CACHE_CONFIG = {
+    'max_entries': int(os.getenv('CACHE_MAX_ENTRIES', 256)),
+    'ttl': {
+        'suppliers': int(os.getenv('CACHE_TTL_SUPPLIERS', 300)),
+        'medicines': int(os.getenv('CACHE_TTL_MEDICINES', 30)),
+        'expiring': int(os.getenv('CACHE_TTL_EXPIRING', 60))
+    }
+}
+
+# Bulk Import Configuration
+BULK_IMPORT_CONFIG = {
+    # Rows validated, resolved and inserted per round trip / transaction
+    'chunk_size': int(os.getenv('BULK_IMPORT_CHUNK_SIZE', 1000)),
+    # Per-row errors listed in the report (the failed count is always exact)
+    'max_errors': int(os.getenv('BULK_IMPORT_MAX_ERRORS', 1000))
+}
+
+# Report Configuration
+REPORT_CONFIG = {
+    # Threads shared by all requests for running report queries side by side
+    # on separate pooled connections (1 runs them one after another)
+    'fanout_workers': int(os.getenv('REPORT_FANOUT_WORKERS', 6))
+}
+
+# Query Profiling Configuration
+PROFILING_CONFIG = {
+    # Adds a Server-Timing header (db, acquire, serialize, total) to every response
+    'enabled': os.getenv('PROFILING_ENABLED', 'True') == 'True',
+    # Statements slower than this are logged, with their EXPLAIN plan for SELECTs
+    'slow_query_ms': float(os.getenv('SLOW_QUERY_MS', 200)),
+    'explain': os.getenv('SLOW_QUERY_EXPLAIN', 'True') == 'True'
+}
+
+# Dashboard KPI Configuration
+KPI_CONFIG = {
+    # Seconds between reloads of the in-memory /api/kpis counters from the
+    # database (corrects writes made by other workers or outside the API)
+    'reconcile_interval': int(os.getenv('KPI_RECONCILE_SECONDS', 60))
+}
+
+# Inventory Alert Configuration
+ALERT_CONFIG = {
+    # Seconds between rebuilds of the in-memory /api/inventory/alerts index
+    # (it is also rebuilt when the date changes); like KPI_RECONCILE_SECONDS
+    # this bounds how long a change made by another worker goes unseen
+    'reconcile_interval': int(os.getenv('ALERT_RECONCILE_SECONDS', 60))
+}
+
+# Idempotency-Key Configuration (POST /api/sales)
+IDEMPOTENCY_CONFIG = {
+    # Seconds a key and its stored response are kept for retries
+    'ttl': int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400)),
+    # Expired keys are deleted sweep_batch at a time, at most every
+    # sweep_interval seconds per process (sooner while a backlog remains)
+    'sweep_interval': int(os.getenv('IDEMPOTENCY_SWEEP_SECONDS', 300)),
+    'sweep_batch': int(os.getenv('IDEMPOTENCY_SWEEP_BATCH', 1000))
+}
+
+# Push Notification Configuration (/ws/notifications)
+NOTIFICATION_CONFIG = {
+    # Seconds between keep-alive comments on an idle stream
+    'heartbeat': int(os.getenv('NOTIFY_HEARTBEAT', 15)),
+    # Undelivered events allowed per client before it is cut off to reconnect
+    'max_pending': int(os.getenv('NOTIFY_MAX_PENDING', 256)),
+    # Recent events kept for clients resuming with Last-Event-ID
+    'history': int(os.getenv('NOTIFY_HISTORY', 1000)),
+    # Seconds between polls of notification_events (events from every process)
+    'poll_interval': float(os.getenv('NOTIFY_POLL_INTERVAL', 1.0)),
+    # Seconds a stored event is kept before it is deleted
+    'retention': int(os.getenv('NOTIFY_RETENTION_SECONDS', 3600))
+}
+
+# JSON Encoding Configuration ('auto' uses orjson when installed, 'stdlib' never does)
+JSON_CONFIG = {
+    'backend': os.getenv('JSON_BACKEND', 'auto')
+}
+
+# Flask Configuration (debug mode must be switched on explicitly)
 FLASK_CONFIG = {
-    'DEBUG': os.getenv('FLASK_DEBUG', 'True') == 'True',
+    'DEBUG': os.getenv('FLASK_DEBUG', 'False') == 'True',
     'PORT': int(os.getenv('FLASK_PORT', 5000)),
     'HOST': os.getenv('FLASK_HOST', '0.0.0.0')
 }
 
+# Production WSGI server (gunicorn.conf.py)
+SERVER_CONFIG = {
+    'workers': int(os.getenv('SERVER_WORKERS', 2 * (os.cpu_count() or 1) + 1)),
+    'threads': int(os.getenv('SERVER_THREADS', 4)),
+    # Recycle a worker after this many requests (plus up to jitter more) to cap leaks
+    'max_requests': int(os.getenv('SERVER_MAX_REQUESTS', 1000)),
+    'max_requests_jitter': int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 100)),
+    'timeout': int(os.getenv('SERVER_TIMEOUT', 30)),
+    'graceful_timeout': int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30)),
+    'preload': os.getenv('SERVER_PRELOAD', 'True') == 'True'
+}
@@ -0,0 +1,152 @@
+"""
+MySQL connection pool for the Medical Storage Management System backend
+Keeps warm connections between requests instead of reconnecting per call
+"""
+
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no connection could be checked out before the timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections with health checks and metrics"""
+
+    def __init__(self, db_config, pool_size=10, checkout_timeout=5.0,
+                 ping_interval=30, recycle=3600):
+        self.db_config = dict(db_config)
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+        self.recycle = recycle
+
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._idle = deque()  # (connection, created_at, last_used)
+        self._born = {}       # id(connection) -> created_at
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_check_failures': 0,
+            'in_use': 0,
+            'peak_in_use': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def _open(self):
+        """Open a brand new connection"""
+        connection = mysql.connector.connect(**self.db_config)
+        with self._lock:
+            self._stats['connections_created'] += 1
+            self._born[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection):
+        """Close a connection that should not be reused"""
+        with self._lock:
+            self._stats['connections_discarded'] += 1
+            self._born.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _checkout_idle(self):
+        """Return a healthy idle connection, or None if there is none"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, created_at, last_used = self._idle.pop()
+
+            now = time.monotonic()
+            if self.recycle and now - created_at > self.recycle:
+                self._discard(connection)
+                continue
+
+            if now - last_used > self.ping_interval:
+                try:
+                    connection.ping(reconnect=False)
+                except Error:
+                    with self._lock:
+                        self._stats['health_check_failures'] += 1
+                    self._discard(connection)
+                    continue
+
+            return connection
+
+    def acquire(self):
+        """Check out a connection, waiting up to checkout_timeout seconds"""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolTimeout(
+                msg=f'Connection pool exhausted ({self.pool_size} in use) '
+                    f'after waiting {self.checkout_timeout}s'
+            )
+
+        try:
+            connection = self._checkout_idle() or self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._stats['in_use'])
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, ending any open transaction"""
+        try:
+            # Rolling back also drains unread results and drops the
+            # REPEATABLE READ snapshot so the next borrower sees fresh data
+            connection.rollback()
+            reusable = connection.is_connected()
+        except Error:
+            reusable = False
+
+        with self._lock:
+            self._stats['in_use'] -= 1
+            created_at = self._born.get(id(connection), time.monotonic())
+            if reusable:
+                self._idle.append((connection, created_at, time.monotonic()))
+
+        if not reusable:
+            self._discard(connection)
+        self._slots.release()
+
+    def reset(self):
+        """Forget every idle connection, e.g. in a freshly forked worker.
+
+        The sockets belong to the parent process, so they are dropped
+        without sending a QUIT that would tear down the parent's session.
+        """
+        with self._lock:
+            for connection, _, _ in self._idle:
+                self._born.pop(id(connection), None)
+            self._idle.clear()
+
+    def stats(self):
+        """Snapshot of pool utilization and exhaustion counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['pool_size'] = self.pool_size
+        stats['wait_time_total'] = round(stats['wait_time_total'], 6)
+        stats['wait_time_max'] = round(stats['wait_time_max'], 6)
+        return stats
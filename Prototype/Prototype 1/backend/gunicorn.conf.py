@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for running the API in production
+Values come from SERVER_CONFIG / FLASK_CONFIG in config.py (and so from .env).
+
+Run from the backend folder:  gunicorn app:app
+
+Graceful reload: kill -HUP <master pid> replaces the workers without
+dropping requests. With preload on, the master keeps the code it loaded,
+so deploy new code with kill -USR2 <master pid> (starts a new master)
+followed by kill -TERM <old master pid>, or set SERVER_PRELOAD=False.
+"""
+
+from config import FLASK_CONFIG, SERVER_CONFIG
+
+bind = f"{FLASK_CONFIG['HOST']}:{FLASK_CONFIG['PORT']}"
+
+workers = SERVER_CONFIG['workers']
+threads = SERVER_CONFIG['threads']
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+max_requests = SERVER_CONFIG['max_requests']
+max_requests_jitter = SERVER_CONFIG['max_requests_jitter']
+timeout = SERVER_CONFIG['timeout']
+graceful_timeout = SERVER_CONFIG['graceful_timeout']
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = SERVER_CONFIG['preload']
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Give every worker its own DB pool, cache and report threads"""
+    from app import init_worker
+    init_worker()
@@ -0,0 +1,135 @@
+"""
+Idempotency keys for POST /api/sales
+A client that sends an Idempotency-Key header can retry a sale submission
+(after a timeout or a dropped connection) without booking it twice. The
+key is inserted into idempotency_keys in the same transaction as the sale
+and given the response before the commit, so a key exists exactly when
+its sale does. A later retry finds the row and gets the stored response
+back. A retry racing the first attempt waits on the row lock until that
+attempt commits (and then replays it) or rolls back (and then books the
+sale itself). Failed attempts, such as insufficient stock, roll the key
+back with everything else, so they can be retried for real.
+
+Keys expire after ttl seconds. Expired rows are deleted in batches from
+the request path, at most once per sweep_interval per process.
+"""
+
+import hashlib
+import threading
+import time
+
+from mysql.connector import Error, errorcode
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(body):
+    """SHA-256 of the raw request body, to catch a key reused for a different request"""
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+class IdempotencyKeys:
+    """Reserve, complete and expire keys; the SQL runs on the caller's cursor and transaction"""
+
+    def __init__(self, ttl=86400, sweep_interval=300, sweep_batch=1000):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+        self._sweeping = False
+
+    def reserve(self, cursor, endpoint, key, fingerprint):
+        """Claim key for this request inside the caller's transaction.
+
+        Returns None when the caller should go ahead (and call complete
+        before committing), or (status_code, response_body, request_hash)
+        stored by the request that used the key first. Either way the
+        key's row stays locked until the transaction ends. Call it first
+        in the transaction: a deadlock is retried once, after InnoDB has
+        rolled the transaction back.
+        """
+        try:
+            return self._reserve(cursor, endpoint, key, fingerprint)
+        except Error as e:
+            if e.errno != errorcode.ER_LOCK_DEADLOCK:
+                raise
+            # Two retries of one key both waited on the INSERT's duplicate
+            # check, then both asked to lock the row; the survivor now
+            # holds it, so this attempt waits on it and then replays
+            return self._reserve(cursor, endpoint, key, fingerprint)
+
+    def _reserve(self, cursor, endpoint, key, fingerprint):
+        try:
+            cursor.execute("""
+                INSERT INTO idempotency_keys (endpoint, idempotency_key, request_hash, expires_at)
+                VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+            """, (endpoint, key, fingerprint, self.ttl))
+            return None
+        except Error as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+
+        cursor.execute("""
+            SELECT status_code, response_body, request_hash, expires_at < NOW()
+            FROM idempotency_keys
+            WHERE endpoint = %s AND idempotency_key = %s
+            FOR UPDATE
+        """, (endpoint, key))
+        row = cursor.fetchone()
+        if row is None:
+            # Swept between the two statements: the key is free again
+            return self._reserve(cursor, endpoint, key, fingerprint)
+
+        status_code, response_body, request_hash, expired = row
+        if expired:
+            # Not swept yet, but past its TTL: take it over
+            cursor.execute("""
+                UPDATE idempotency_keys
+                SET request_hash = %s, status_code = NULL, response_body = NULL,
+                    created_at = NOW(), expires_at = NOW() + INTERVAL %s SECOND
+                WHERE endpoint = %s AND idempotency_key = %s
+            """, (fingerprint, self.ttl, endpoint, key))
+            return None
+        return status_code, response_body, request_hash
+
+    def complete(self, cursor, endpoint, key, status_code, response_body):
+        """Store the response of a reserved key (in the same transaction as the work it describes)"""
+        cursor.execute("""
+            UPDATE idempotency_keys
+            SET status_code = %s, response_body = %s
+            WHERE endpoint = %s AND idempotency_key = %s
+        """, (status_code, response_body, endpoint, key))
+
+    def claim_sweep(self):
+        """True for the one caller that should delete expired keys now"""
+        with self._lock:
+            if self._sweeping or time.monotonic() - self._swept_at < self.sweep_interval:
+                return False
+            self._sweeping = True
+            return True
+
+    def sweep(self, connection):
+        """Delete one batch of expired keys in its own transaction; returns how many went"""
+        deleted = 0
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                DELETE FROM idempotency_keys
+                WHERE expires_at < NOW()
+                ORDER BY expires_at
+                LIMIT %s
+            """, (self.sweep_batch,))
+            deleted = cursor.rowcount
+            connection.commit()
+            cursor.close()
+        except Error as e:
+            connection.rollback()
+            print(f"Error sweeping expired idempotency keys: {e}")
+        finally:
+            with self._lock:
+                self._sweeping = False
+                # A full batch means more are waiting: let the next request carry on
+                self._swept_at = 0.0 if deleted >= self.sweep_batch else time.monotonic()
+        return deleted
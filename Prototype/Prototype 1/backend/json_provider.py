@@ -0,0 +1,83 @@
+"""
+Fast JSON encoding for API responses
+Encodes MySQL row values (date, datetime, Decimal) directly, so handlers
+can return cursor rows as they come. Uses orjson when it is installed
+(and JSON_BACKEND allows it), otherwise the standard library encoder.
+
+Wire format: dates as "YYYY-MM-DD", datetimes as "YYYY-MM-DD HH:MM:SS",
+Decimals as JSON numbers. packb() writes the same values as MessagePack
+when the msgpack package is installed.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from config import JSON_CONFIG
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+USE_ORJSON = orjson is not None and JSON_CONFIG['backend'] in ('auto', 'orjson')
+
+
+# Exact-type fast path for what MySQL rows contain; isoformat is much cheaper than strftime
+_ENCODERS = {
+    datetime: lambda value: value.isoformat(' ', 'seconds'),
+    date: date.isoformat,
+    Decimal: float,
+}
+
+
+def encode_value(value):
+    """JSON-compatible form of a value the encoder does not handle itself"""
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    return DefaultJSONProvider.default(value)
+
+
+if USE_ORJSON:
+    # orjson would write datetimes as RFC 3339; pass them through to keep the wire format
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj, indent=None):
+        """Encode obj to a JSON string"""
+        options = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=encode_value, option=options).decode('utf-8')
+else:
+    def dumps(obj, indent=None):
+        """Encode obj to a JSON string"""
+        return json.dumps(obj, default=encode_value, sort_keys=True, indent=indent,
+                          separators=(', ', ': ') if indent else (',', ':'))
+
+
+def packb(obj):
+    """Encode obj as MessagePack bytes (requires msgpack)"""
+    return msgpack.packb(obj, default=encode_value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps()"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, indent=kwargs.get('indent'))
@@ -0,0 +1,88 @@
+"""
+In-memory dashboard KPI figures
+/api/kpis reads these counters instead of scanning the medicines table.
+They are loaded from the database on first use, moved by the deltas of
+every committed medicine or stock change, and reloaded every
+reconcile_interval seconds to correct drift from writes made outside
+this process (other workers, scripts, manual SQL).
+"""
+
+import threading
+import time
+
+KPI_FIGURES = ('inventory_value', 'pending_count', 'low_stock_count')
+
+
+class KPIState:
+    """Process-wide inventory KPI counters"""
+
+    def __init__(self, reconcile_interval=60):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._figures = None
+        self._loaded_at = 0.0
+        self._reconciling = False
+        self.reconciles = 0
+        self.drift_corrections = 0
+
+    def reset(self):
+        """Forget the figures, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._figures = None
+            self._loaded_at = 0.0
+            self._reconciling = False
+
+    @property
+    def loaded(self):
+        return self._figures is not None
+
+    def claim_reconcile(self):
+        """True for the one caller that should reload the figures now.
+
+        Before the first load every caller gets True (there is nothing
+        to serve yet); afterwards a single caller per interval does.
+        """
+        with self._lock:
+            if self._figures is None:
+                return True
+            if self._reconciling or time.monotonic() - self._loaded_at < self.reconcile_interval:
+                return False
+            self._reconciling = True
+            return True
+
+    def load(self, figures):
+        """Replace the counters with freshly queried figures"""
+        figures = {
+            'inventory_value': round(float(figures['inventory_value']), 2),
+            'pending_count': int(figures['pending_count']),
+            'low_stock_count': int(figures['low_stock_count']),
+        }
+        with self._lock:
+            previous = self._figures
+            self._figures = figures
+            self._loaded_at = time.monotonic()
+            self._reconciling = False
+            self.reconciles += 1
+        if previous is not None and previous != figures:
+            self.drift_corrections += 1
+            drift = {name: round(figures[name] - previous[name], 2) for name in KPI_FIGURES}
+            print(f"KPI counters drifted from the database, corrected by {drift}")
+
+    def release_reconcile(self):
+        """Give up a claimed reload (e.g. the query failed) so another caller can retry"""
+        with self._lock:
+            self._reconciling = False
+
+    def apply(self, deltas):
+        """Move the counters by a committed change (see notifications.inventory_deltas)"""
+        with self._lock:
+            if self._figures is None:
+                return
+            for name in KPI_FIGURES:
+                self._figures[name] += deltas.get(name, 0)
+            self._figures['inventory_value'] = round(self._figures['inventory_value'], 2)
+
+    def figures(self):
+        """Copy of the current counters, or None before the first load"""
+        with self._lock:
+            return dict(self._figures) if self._figures is not None else None
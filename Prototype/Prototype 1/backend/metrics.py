@@ -0,0 +1,173 @@
+"""
+In-process request metrics in the Prometheus text exposition format
+Counts requests, latency and errors per route, tracks requests in flight,
+and renders those together with the DB pool, response cache and push
+notification stats.
+
+Counters live in each worker process; with several workers every scrape
+sees the process that answered it, told apart by the "pid" label.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DB_CONNECTION_FAILED = 'Database connection failed'
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """Per-route request counters and latency histograms for a Flask app"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._requests = {}   # (method, route, status) -> count
+        self._latency = {}    # (method, route) -> [bucket counts..., +Inf count, sum]
+        self._errors = {}     # (route, type) -> count
+        self._in_flight = 0
+
+    def reset(self):
+        """Start from zero, e.g. in a freshly forked worker"""
+        with self._lock:
+            self.started = time.time()
+            self.pid = os.getpid()
+            self._requests.clear()
+            self._latency.clear()
+            self._errors.clear()
+            self._in_flight = 0
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def _start(self):
+        g.metrics_started = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+    def _finish(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+
+        if response.status_code >= 500:
+            body = None if response.is_streamed else response.get_json(silent=True)
+            failed = isinstance(body, dict) and body.get('error') == DB_CONNECTION_FAILED
+            # Counted in _teardown, which knows whether an exception caused it
+            g.metrics_error = 'db_connection_failed' if failed else 'server_error'
+
+        index = bisect_left(self.buckets, elapsed)
+        with self._lock:
+            self._in_flight -= 1
+            key = (method, route, response.status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += elapsed
+        return response
+
+    def _teardown(self, exc=None):
+        # An unhandled exception also reaches _finish as a generated 500;
+        # count it once, as the exception
+        error = 'unhandled_exception' if exc is not None else g.pop('metrics_error', None)
+        if error is None:
+            return
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        with self._lock:
+            key = (route, error)
+            self._errors[key] = self._errors.get(key, 0) + 1
+            if 'metrics_started' in g:
+                # after_request never ran for this request
+                self._in_flight -= 1
+
+    def render(self, pool=None, cache=None, notifications=None):
+        """Prometheus text format for the request metrics plus pool, cache and push stats"""
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {key: list(value) for key, value in self._latency.items()}
+            errors = dict(self._errors)
+            in_flight = self._in_flight
+        pid = self.pid
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(pid=pid, **labels)} {value}')
+
+        metric('medlocus_process_start_time_seconds', 'gauge', 'Start time of this worker process',
+               [({}, round(self.started, 3))])
+        metric('medlocus_http_requests_in_flight', 'gauge', 'Requests currently being handled',
+               [({}, in_flight)])
+        metric('medlocus_http_requests_total', 'counter', 'Requests handled, by route and status',
+               [({'method': method, 'route': route, 'status': status}, count)
+                for (method, route, status), count in sorted(requests.items())])
+
+        lines.append('# HELP medlocus_http_request_duration_seconds Request latency by route')
+        lines.append('# TYPE medlocus_http_request_duration_seconds histogram')
+        for (method, route), histogram in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), histogram[:-1]):
+                cumulative += count
+                labels = _labels(pid=pid, method=method, route=route, le=bound)
+                lines.append(f'medlocus_http_request_duration_seconds_bucket{labels} {cumulative}')
+            labels = _labels(pid=pid, method=method, route=route)
+            lines.append(f'medlocus_http_request_duration_seconds_sum{labels} {histogram[-1]:.6f}')
+            lines.append(f'medlocus_http_request_duration_seconds_count{labels} {cumulative}')
+
+        metric('medlocus_http_errors_total', 'counter',
+               'Failed requests by route and type (db_connection_failed, server_error, unhandled_exception)',
+               [({'route': route, 'type': kind}, count) for (route, kind), count in sorted(errors.items())])
+
+        if pool is not None:
+            metric('medlocus_db_pool_connections', 'gauge', 'Pooled MySQL connections by state',
+                   [({'state': 'in_use'}, pool['in_use']), ({'state': 'idle'}, pool['idle'])])
+            metric('medlocus_db_pool_size', 'gauge', 'Maximum pooled connections',
+                   [({}, pool['pool_size'])])
+            metric('medlocus_db_pool_peak_in_use', 'gauge', 'Most connections checked out at once',
+                   [({}, pool['peak_in_use'])])
+            for name in ('checkouts', 'timeouts', 'connections_created', 'connections_discarded',
+                         'health_check_failures'):
+                metric(f'medlocus_db_pool_{name}_total', 'counter', f'Connection pool {name.replace("_", " ")}',
+                       [({}, pool[name])])
+            metric('medlocus_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a pooled connection',
+                   [({}, pool['wait_time_total'])])
+
+        if cache is not None:
+            metric('medlocus_cache_entries', 'gauge', 'Cached responses held',
+                   [({}, cache['size'])])
+            metric('medlocus_cache_hit_ratio', 'gauge', 'Cache hits / lookups since start',
+                   [({}, cache['hit_ratio'])])
+            metric('medlocus_cache_lookups_total', 'counter', 'Response cache lookups by route and result',
+                   [({'route': route, 'result': result}, counts[result])
+                    for route, counts in sorted(cache['routes'].items()) for result in ('hits', 'misses')])
+            for name in ('evictions', 'expirations', 'invalidations', 'stale_discards'):
+                metric(f'medlocus_cache_{name}_total', 'counter', f'Response cache {name}',
+                       [({}, cache[name])])
+
+        if notifications is not None:
+            metric('medlocus_push_subscribers', 'gauge', 'Clients connected to /ws/notifications',
+                   [({}, notifications['subscribers'])])
+            metric('medlocus_push_events_total', 'counter', 'Events published to push clients',
+                   [({}, notifications['published'])])
+
+        return '\n'.join(lines) + '\n'
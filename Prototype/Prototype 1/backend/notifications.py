@@ -0,0 +1,334 @@
+"""
+Push notifications for dashboards
+Write routes store events in the notification_events table after they
+commit; an EventFeed thread in every process polls the table and hands
+new rows to that process's hub, which fans them out to its connected
+/ws/notifications clients (a WebSocket under asgi.py, Server-Sent Events
+from Flask). So every client hears about every write, whichever worker
+handled it. Events are {"id": n, "type": ..., "payload": ...}, with the
+table's id, so a client can resume from any process; the frontend's
+useRealtime hook handles "kpi_update" ({"id": "k3", "value": <delta>})
+and "notification".
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+from mysql.connector import Error
+
+from json_provider import dumps
+
+# Thresholds matching /api/kpis and /api/inventory/alerts
+PENDING_BELOW = 10
+LOW_STOCK_BELOW = 5
+EXPIRY_WINDOW_DAYS = 30
+
+# Above this many crossings in one change (e.g. a bulk import) a single
+# summary notification is sent instead of one per medicine
+MAX_NOTICES = 20
+
+# Marks a subscriber that fell too far behind; its stream ends and the
+# client reconnects with Last-Event-ID to catch up from the history
+OVERFLOW = object()
+
+_notice_ids = itertools.count(1)
+
+# Seconds between deletions of events older than the feed's retention
+PRUNE_INTERVAL = 60
+
+# Most skipped ids one poll waits for (a larger jump is rolled-back inserts)
+MAX_GAPS = 100
+
+
+class Subscriber:
+    """Bounded queue of events for one connected client"""
+
+    def __init__(self, max_pending=256):
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._queue = queue.Queue()
+
+    def deliver(self, event):
+        """Called by the hub (from the publishing thread)"""
+        if self.overflowed:
+            return
+        if self._queue.qsize() >= self.max_pending:
+            self.overflowed = True
+            event = OVERFLOW
+        self._queue.put_nowait(event)
+
+    def get(self, timeout):
+        """Next event, None after timeout seconds of silence, or OVERFLOW"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class NotificationHub:
+    """Fans events (as read by the EventFeed) out to every subscriber of this process"""
+
+    def __init__(self, history=1000):
+        self.history = history
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self.published = 0
+
+    def reset(self):
+        """Forget subscribers and history, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._subscribers.clear()
+            self._history.clear()
+            self.published = 0
+
+    def subscribe(self, subscriber, last_event_id=None):
+        """Register a subscriber, first replaying the events it missed after last_event_id"""
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        subscriber.deliver(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        """Send an event to every subscriber"""
+        with self._lock:
+            self._history.append(event)
+            self.published += 1
+            for subscriber in self._subscribers:
+                subscriber.deliver(event)
+
+    def remember(self, event):
+        """Add an event to the replay history only (events from before this process started)"""
+        with self._lock:
+            self._history.append(event)
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': len(self._subscribers), 'published': self.published}
+
+
+def store_events(connection, events):
+    """Insert (type, payload) events into notification_events and commit them.
+
+    Call after committing the change they describe, so no process hears
+    of a write that was rolled back.
+    """
+    cursor = connection.cursor()
+    cursor.executemany(
+        "INSERT INTO notification_events (event_type, payload) VALUES (%s, %s)",
+        [(event_type, dumps(payload)) for event_type, payload in events]
+    )
+    connection.commit()
+    cursor.close()
+
+
+class EventFeed:
+    """Polls notification_events for new rows and publishes them to a hub (one thread per process)"""
+
+    def __init__(self, hub, poll_interval=1.0, batch=500, retention=3600, gap_wait=5.0):
+        self.hub = hub
+        self.poll_interval = poll_interval
+        self.batch = batch
+        self.retention = retention
+        self.gap_wait = gap_wait
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_id = None
+        self._gaps = {}
+        self._pruned_at = 0.0
+
+    def reset(self):
+        """Forget the position and thread, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._thread = None
+            self._last_id = None
+            self._gaps = {}
+
+    def ensure_running(self, db_connection):
+        """Start the polling thread if it is not running; db_connection is app.db_connection"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(db_connection,),
+                                            name='notification-feed', daemon=True)
+            self._thread.start()
+
+    def _run(self, db_connection):
+        while True:
+            with db_connection() as connection:
+                if connection:
+                    try:
+                        self.poll(connection)
+                    except Error as e:
+                        print(f"Error polling notification events: {e}")
+            time.sleep(self.poll_interval)
+
+    def poll(self, connection):
+        """Publish the events stored since the last poll; returns how many"""
+        cursor = connection.cursor()
+        if self._last_id is None:
+            # First poll: load recent events into the replay history only,
+            # so clients resuming with an older id can catch up here too
+            cursor.execute("""
+                SELECT id, event_type, payload FROM (
+                    SELECT id, event_type, payload FROM notification_events ORDER BY id DESC LIMIT %s
+                ) recent ORDER BY id
+            """, (self.hub.history,))
+            rows = cursor.fetchall()
+            for row in rows:
+                self.hub.remember(self._event(row))
+            self._last_id = rows[-1][0] if rows else 0
+            cursor.close()
+            return 0
+
+        # AUTO_INCREMENT ids are taken at INSERT but become visible at
+        # COMMIT, so a lower id can appear after a higher one was read:
+        # ids skipped over are looked for again for gap_wait seconds
+        now = time.monotonic()
+        self._gaps = {gap: seen for gap, seen in self._gaps.items() if now - seen < self.gap_wait}
+        gaps = sorted(self._gaps)
+        where = "id > %s" + (f" OR id IN ({', '.join(['%s'] * len(gaps))})" if gaps else "")
+        cursor.execute(f"""
+            SELECT id, event_type, payload FROM notification_events
+            WHERE {where}
+            ORDER BY id
+            LIMIT %s
+        """, (self._last_id, *gaps, self.batch))
+        rows = cursor.fetchall()
+        for row in rows:
+            event_id = row[0]
+            if event_id > self._last_id:
+                for gap in range(max(self._last_id + 1, event_id - MAX_GAPS), event_id):
+                    self._gaps[gap] = now
+                self._last_id = event_id
+            else:
+                del self._gaps[event_id]
+            self.hub.publish(self._event(row))
+
+        if now - self._pruned_at >= PRUNE_INTERVAL:
+            self._pruned_at = now
+            cursor.execute("""
+                DELETE FROM notification_events
+                WHERE created_at < NOW() - INTERVAL %s SECOND
+                ORDER BY id
+                LIMIT %s
+            """, (self.retention, self.batch))
+            connection.commit()
+        cursor.close()
+        return len(rows)
+
+    @staticmethod
+    def _event(row):
+        event_id, event_type, payload = row
+        return {'id': event_id, 'type': event_type, 'payload': json.loads(payload)}
+
+
+def parse_event_id(value):
+    """Last-Event-ID header value as an int, or None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def sse_message(event):
+    """One event in text/event-stream framing"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event)}\n\n"
+
+
+def as_date(value):
+    """date from a DATE column value or a YYYY-MM-DD string (None if neither)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _inventory_totals(rows):
+    value = pending = low = 0
+    for _, quantity, price, _ in rows.values():
+        value += float(price) * quantity
+        pending += quantity < PENDING_BELOW
+        low += quantity < LOW_STOCK_BELOW
+    return value, pending, low
+
+
+def inventory_deltas(before, after):
+    """Change in the /api/kpis inventory figures between two stock snapshots.
+
+    before and after map a medicine key to (name, quantity, price,
+    exp_date) as read inside the transaction; a key missing from one
+    side is a medicine that was inserted or deleted.
+    """
+    value_before, pending_before, low_before = _inventory_totals(before)
+    value_after, pending_after, low_after = _inventory_totals(after)
+    return {
+        'inventory_value': round(value_after - value_before, 2),
+        'pending_count': pending_after - pending_before,
+        'low_stock_count': low_after - low_before,
+    }
+
+
+def inventory_events(before, after, deltas=None, today=None):
+    """Events describing a committed change to some medicines.
+
+    Takes the same snapshots as inventory_deltas (and its result, if
+    already computed). Returns a list of (type, payload): kpi_update
+    deltas for the /api/kpis figures plus notifications for medicines
+    that crossed into low stock or into the expiry window.
+    """
+    deltas = deltas or inventory_deltas(before, after)
+    today = today or date.today()
+    expiry_limit = today + timedelta(days=EXPIRY_WINDOW_DAYS)
+    value_delta = deltas['inventory_value']
+
+    events = []
+    for kpi_id, delta in (
+        ('k1', round(value_delta * 0.1, 2)),  # /api/kpis derives today's sales from inventory value
+        ('k2', deltas['pending_count']),
+        ('k3', deltas['low_stock_count']),
+        ('k4', value_delta),
+    ):
+        if delta:
+            events.append(('kpi_update', {'id': kpi_id, 'value': delta}))
+
+    stamp = datetime.now().isoformat(timespec='seconds')
+    low_stock, expiring = [], []
+    for key, (name, quantity, _, exp_date) in after.items():
+        old = before.get(key)
+        if quantity < LOW_STOCK_BELOW and (old is None or old[1] >= LOW_STOCK_BELOW):
+            low_stock.append(f'Item low stock: {name} ({quantity} left)')
+        expires = as_date(exp_date)
+        was_expiring = old is not None and (as_date(old[3]) or date.max) <= expiry_limit
+        if expires and expires <= expiry_limit and not was_expiring:
+            expiring.append(f'Expiry warning: {name} expires {expires.isoformat()}')
+
+    for kind, messages, summary in (
+        ('low-stock', low_stock, 'medicines dropped to low stock'),
+        ('expiry', expiring, 'medicines now expire within 30 days'),
+    ):
+        if len(messages) > MAX_NOTICES:
+            messages = [f'{len(messages)} {summary}']
+        for message in messages:
+            events.append(('notification', {
+                'id': f'{kind}-{next(_notice_ids)}',
+                'message': message,
+                'createdAt': stamp,
+            }))
+    return events
@@ -0,0 +1,224 @@
+"""
+Per-request query profiling for the Flask backend
+Counts SQL statements, rows fetched and the time spent in MySQL, waiting
+for a pooled connection and encoding JSON, reports them to the client in
+a Server-Timing header and logs slow statements with their EXPLAIN plan.
+Statements can also be collected for offline analysis (index_advisor.py).
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from mysql.connector import Error
+
+from json_provider import FastJSONProvider
+
+_current = ContextVar('query_profile', default=None)
+
+
+class RequestProfile:
+    """Counters for one request; shared by every thread working on it"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.rows = 0
+        self.db_time = 0.0
+        self.acquire_time = 0.0
+        self.serialize_time = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def server_timing(self):
+        total = (time.perf_counter() - self.started) * 1000
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements, {self.rows} rows"',
+            f'acquire;dur={self.acquire_time * 1000:.2f}',
+            f'serialize;dur={self.serialize_time * 1000:.2f}',
+            f'total;dur={total:.2f}',
+        ])
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+class ProfiledCursor:
+    """Cursor wrapper that times execute/fetch calls and counts rows"""
+
+    def __init__(self, cursor, connection, profile):
+        self._cursor = cursor
+        self._connection = connection
+        self._profile = profile
+        self._statement = None  # [operation, params, elapsed] of the last execute
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _timed(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._profile.add(db_time=elapsed)
+            if self._statement is not None:
+                self._statement[2] += elapsed
+
+    def _finish_statement(self):
+        if self._statement is not None:
+            self._connection.check_slow(*self._statement)
+            self._statement = None
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish_statement()
+        self._statement = [operation, params, 0.0]
+        self._profile.add(statements=1)
+        return self._timed(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._finish_statement()
+        self._statement = [operation, None, 0.0]
+        self._profile.add(statements=1)
+        return self._timed(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        self._profile.add(rows=_row_count(row))
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed(self._cursor.fetchmany, *args, **kwargs)
+        self._profile.add(rows=_row_count(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._profile.add(rows=_row_count(rows))
+        return rows
+
+    def close(self):
+        self._finish_statement()
+        return self._cursor.close()
+
+
+class ProfiledConnection:
+    """Connection wrapper handing out ProfiledCursors"""
+
+    def __init__(self, connection, profiler, profile):
+        self._connection = connection
+        self._profiler = profiler
+        self._profile = profile
+        self._cursors = []
+        self._slow = []
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = ProfiledCursor(self._connection.cursor(*args, **kwargs), self, self._profile)
+        self._cursors.append(cursor)
+        return cursor
+
+    def check_slow(self, operation, params, elapsed):
+        collector = self._profiler.collector
+        if collector is not None:
+            collector.append((operation, params))
+        if elapsed * 1000 >= self._profiler.slow_query_ms:
+            self._slow.append((operation, params, elapsed))
+
+    def finish(self):
+        """Close out open statements and log the slow ones (before the connection is released)"""
+        for cursor in self._cursors:
+            cursor._finish_statement()
+        for operation, params, elapsed in self._slow:
+            self._profiler.log_slow_query(self._connection, operation, params, elapsed)
+
+
+class ProfilingJSONProvider(FastJSONProvider):
+    """The app's JSON provider, timing every dumps() call against the request"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile = _current.get()
+            if profile is not None:
+                profile.add(serialize_time=time.perf_counter() - started)
+
+
+class QueryProfiler:
+    """Attaches a RequestProfile to every request of a Flask app"""
+
+    def __init__(self, enabled=True, slow_query_ms=200, explain=True):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        # While set to a list, every (operation, params) executed by a
+        # profiled request is appended to it (used by index_advisor.py)
+        self.collector = None
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.json = ProfilingJSONProvider(app)
+        app.before_request(self._start)
+        app.after_request(self._report)
+        app.teardown_request(self._stop)
+
+    def _start(self):
+        g.query_profile_token = _current.set(RequestProfile())
+
+    def _report(self, response):
+        profile = _current.get()
+        if profile is not None:
+            response.headers['Server-Timing'] = profile.server_timing()
+        return response
+
+    def _stop(self, exc=None):
+        token = g.pop('query_profile_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def record_acquire(self, seconds):
+        profile = _current.get()
+        if profile is not None:
+            profile.add(acquire_time=seconds)
+
+    def wrap(self, connection):
+        """Profile a pooled connection for the current request (unchanged outside one)"""
+        profile = _current.get()
+        if profile is None:
+            return connection
+        return ProfiledConnection(connection, self, profile)
+
+    def log_slow_query(self, connection, operation, params, elapsed):
+        statement = ' '.join(str(operation).split())
+        where = f'{request.method} {request.path}' if request else 'background'
+        print(f"Slow query ({elapsed * 1000:.1f} ms) during {where}: {statement}")
+        if not self.explain or not statement.upper().startswith(('SELECT', 'WITH')):
+            return
+        try:
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            cursor.execute(f"EXPLAIN {operation}", params)
+            for step in cursor.fetchall():
+                print(f"    EXPLAIN table={step.get('table')} type={step.get('type')} "
+                      f"key={step.get('key')} rows={step.get('rows')} "
+                      f"filtered={step.get('filtered')} extra={step.get('Extra')}")
+            cursor.close()
+        except Error as e:
+            print(f"    EXPLAIN failed: {e}")
@@ -0,0 +1,116 @@
+"""
+Materialized daily sales rollups for the reports endpoints
+Keeps per-day and per-day-per-medicine totals of completed sales so the
+dashboard summary reads a handful of rollup rows instead of raw history.
+
+Run this file directly to rebuild both rollups from sales/sale_items:
+    python sales_rollup.py
+"""
+
+from mysql.connector import Error
+
+ROLLUP_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS daily_sales_rollup (
+        sale_date DATE PRIMARY KEY,
+        total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        sale_count INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_medicine_sales_rollup (
+        sale_date DATE NOT NULL,
+        medicine_id INT NOT NULL,
+        quantity_sold INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, medicine_id),
+        INDEX idx_medicine (medicine_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+
+def apply_sale(cursor, sale_id, sign=1):
+    """Add (sign=1) or remove (sign=-1) a sale's contribution to the rollups.
+
+    Only completed sales are counted. The figures are read from the
+    sale's current rows inside the caller's transaction, so call this
+    after inserting a sale and before updating or deleting one.
+    """
+    cursor.execute("""
+        INSERT INTO daily_sales_rollup (sale_date, total_amount, sale_count)
+        SELECT sale_date, %s * total_amount, %s
+        FROM sales
+        WHERE sale_id = %s AND status = 'completed'
+        ON DUPLICATE KEY UPDATE
+            total_amount = total_amount + VALUES(total_amount),
+            sale_count = sale_count + VALUES(sale_count)
+    """, (sign, sign, sale_id))
+
+    cursor.execute("""
+        INSERT INTO daily_medicine_sales_rollup (sale_date, medicine_id, quantity_sold, revenue)
+        SELECT s.sale_date, si.medicine_id, %s * SUM(si.quantity), %s * SUM(si.subtotal)
+        FROM sales s
+        JOIN sale_items si ON si.sale_id = s.sale_id
+        WHERE s.sale_id = %s AND s.status = 'completed'
+        GROUP BY s.sale_date, si.medicine_id
+        ON DUPLICATE KEY UPDATE
+            quantity_sold = quantity_sold + VALUES(quantity_sold),
+            revenue = revenue + VALUES(revenue)
+    """, (sign, sign, sale_id))
+
+
+def rebuild_rollups(connection):
+    """Recompute both rollup tables from scratch in one transaction"""
+    cursor = connection.cursor()
+    try:
+        for ddl in ROLLUP_SCHEMA:
+            cursor.execute(ddl)
+
+        cursor.execute("DELETE FROM daily_sales_rollup")
+        cursor.execute("DELETE FROM daily_medicine_sales_rollup")
+
+        cursor.execute("""
+            INSERT INTO daily_sales_rollup (sale_date, total_amount, sale_count)
+            SELECT sale_date, SUM(total_amount), COUNT(*)
+            FROM sales
+            WHERE status = 'completed'
+            GROUP BY sale_date
+        """)
+        days = cursor.rowcount
+
+        cursor.execute("""
+            INSERT INTO daily_medicine_sales_rollup (sale_date, medicine_id, quantity_sold, revenue)
+            SELECT s.sale_date, si.medicine_id, SUM(si.quantity), SUM(si.subtotal)
+            FROM sales s
+            JOIN sale_items si ON si.sale_id = s.sale_id
+            WHERE s.status = 'completed'
+            GROUP BY s.sale_date, si.medicine_id
+        """)
+        medicine_days = cursor.rowcount
+
+        connection.commit()
+        return days, medicine_days
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    import mysql.connector
+    from config import DB_CONFIG
+
+    print("Rebuilding daily sales rollups...")
+    connection = None
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+        days, medicine_days = rebuild_rollups(connection)
+        print(f"[OK] {days} daily rows, {medicine_days} daily medicine rows")
+    except Error as e:
+        print(f"\nERROR: {e}")
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
@@ -0,0 +1,43 @@
+"""
+Full-text search helpers for the medicine and customer lookups
+Turns free text into MySQL BOOLEAN MODE queries for the FULLTEXT indexes
+"""
+
+import re
+from config import SEARCH_CONFIG
+
+SEARCH_MODES = ('prefix', 'word')
+
+# Word characters only: everything else (including the boolean-mode
+# operators + - < > ( ) ~ * " @) is treated as a separator
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# InnoDB's default full-text stopword list; these words are never indexed,
+# so requiring one (e.g. "com" from an email address) would match nothing
+STOPWORDS = frozenset([
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for',
+    'from', 'how', 'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the',
+    'this', 'to', 'was', 'what', 'when', 'where', 'who', 'will', 'with', 'und', 'www',
+])
+
+
+def boolean_query(text, mode='prefix'):
+    """Build an AGAINST() string that requires every term in the text.
+
+    In 'prefix' mode each term also matches longer words, which is what
+    a search-as-you-type box needs. Returns None when no term is long
+    enough for the full-text index (innodb_ft_min_token_size).
+    """
+    terms = [term for term in TOKEN_PATTERN.findall(text)
+             if len(term) >= SEARCH_CONFIG['min_token_size'] and term.lower() not in STOPWORDS]
+    if not terms:
+        return None
+    suffix = '*' if mode == 'prefix' else ''
+    return ' '.join(f'+{term}{suffix}' for term in terms)
+
+
+def result_limit(value):
+    """Clamp a requested result count to the configured bounds"""
+    if value is None:
+        return SEARCH_CONFIG['default_limit']
+    return max(1, min(value, SEARCH_CONFIG['max_limit']))
@@ -0,0 +1,174 @@
+"""
+Query-count and latency benchmark for /api/kpis and /api/reports/summary
+Replays the original one-query-per-metric plans ("before") and calls the
+current endpoints through the Flask test client ("after") against a
+seeded benchmark database, then prints the comparison as JSON. /api/kpis
+is served from in-memory counters, so its "after" is a dictionary read;
+"reconcile" times the aggregate query that reloads them
+(reconcile_kpis(), run every KPI_RECONCILE_SECONDS) on its own.
+
+Usage: python benchmarks/bench_aggregates.py [--runs 50] [--seed]
+       [--medicines 100000] [--sales 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+import seed_data  # noqa: E402
+from bench_stats import percentile  # noqa: E402
+
+# The app reads DB_NAME at import time, so point it at the scratch database first
+os.environ['DB_NAME'] = seed_data.BENCH_DATABASE
+
+from mysql.connector.cursor import MySQLCursor  # noqa: E402
+import app as backend  # noqa: E402
+
+seed_data.ensure_bench_database(backend.DB_CONFIG)
+
+try:
+    from mysql.connector.cursor_cext import CMySQLCursor
+except ImportError:
+    CMySQLCursor = None
+
+# Query plans exactly as the handlers issued them before the change
+LEGACY_PLANS = {
+    '/api/kpis': [
+        "SELECT COALESCE(SUM(price * quantity), 0) as total_value FROM medicines",
+        "SELECT COUNT(*) as count FROM medicines WHERE quantity < 10",
+        "SELECT COUNT(*) as count FROM medicines WHERE quantity < 5",
+        "SELECT COALESCE(SUM(price * quantity), 0) as total_value FROM medicines",
+    ],
+    '/api/reports/summary': [
+        """SELECT COALESCE(SUM(total_amount), 0) as total FROM sales
+           WHERE DATE(sale_date) = CURDATE() AND status = 'completed'""",
+        """SELECT COALESCE(SUM(total_amount), 0) as total FROM sales
+           WHERE MONTH(sale_date) = MONTH(CURDATE()) AND YEAR(sale_date) = YEAR(CURDATE())
+           AND status = 'completed'""",
+        "SELECT COUNT(*) as total FROM customers",
+        "SELECT COUNT(*) as total FROM medicines",
+        "SELECT COUNT(*) as total FROM medicines WHERE quantity < 5",
+        """SELECT COUNT(*) as total FROM medicines
+           WHERE exp_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY) AND exp_date >= CURDATE()""",
+        """SELECT m.name, m.company, SUM(si.quantity) as total_sold, SUM(si.subtotal) as revenue
+           FROM sale_items si
+           JOIN sales s ON si.sale_id = s.sale_id
+           JOIN medicines m ON si.medicine_id = m.medicine_id
+           WHERE s.sale_date >= DATE_SUB(CURDATE(), INTERVAL 30 DAY) AND s.status = 'completed'
+           GROUP BY m.medicine_id, m.name, m.company
+           ORDER BY total_sold DESC LIMIT 10""",
+        """SELECT DATE(sale_date) as date, SUM(total_amount) as total FROM sales
+           WHERE sale_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY) AND status = 'completed'
+           GROUP BY DATE(sale_date) ORDER BY date""",
+    ],
+}
+
+
+class StatementCounter:
+    """Counts cursor.execute() calls made while the context is active"""
+
+    def __init__(self):
+        self.count = 0
+        self._patched = []
+
+    def __enter__(self):
+        for cls in (MySQLCursor, CMySQLCursor):
+            if cls is None:
+                continue
+            original = cls.execute
+
+            def execute(cursor, *args, _original=original, **kwargs):
+                self.count += 1
+                return _original(cursor, *args, **kwargs)
+
+            cls.execute = execute
+            self._patched.append((cls, original))
+        return self
+
+    def __exit__(self, *exc):
+        for cls, original in self._patched:
+            cls.execute = original
+        self._patched = []
+
+
+def summarize(durations, statements, runs):
+    return {
+        'queries_per_request': statements // runs,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'max_ms': round(max(durations) * 1000, 3),
+    }
+
+
+def run_legacy(statements):
+    with backend.db_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        for statement in statements:
+            cursor.execute(statement)
+            cursor.fetchall()
+
+
+def run_reconcile():
+    backend.kpi_state.reset()  # makes the reload due on this call
+    if not backend.reconcile_kpis():
+        raise RuntimeError('reconcile_kpis() failed')
+
+
+def measure(fn, runs):
+    fn()  # warm-up: fills the pool and the buffer pool
+    durations = []
+    with StatementCounter() as counter:
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            durations.append(time.perf_counter() - started)
+    return summarize(durations, counter.count, runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark KPI and report aggregation queries')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--seed', action='store_true', help='(Re)seed the benchmark database first')
+    parser.add_argument('--medicines', type=int, default=100_000)
+    parser.add_argument('--sales', type=int, default=1_000_000)
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        seed_data.seed(medicines=args.medicines, sales=args.sales)
+
+    client = backend.app.test_client()
+    results = {}
+    for path, statements in LEGACY_PLANS.items():
+        def call_endpoint(path=path):
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)}')
+
+        results[path] = {
+            'before': measure(lambda statements=statements: run_legacy(statements), args.runs),
+            'after': measure(call_endpoint, args.runs),
+        }
+    # The query cost behind the served-from-memory /api/kpis figures
+    results['/api/kpis']['reconcile'] = measure(run_reconcile, args.runs)
+
+    report = {
+        'database': seed_data.BENCH_DATABASE,
+        'runs': args.runs,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
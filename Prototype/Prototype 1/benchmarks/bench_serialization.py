@@ -0,0 +1,149 @@
+"""
+Serialization micro-benchmark for the /api/medicines response body
+Encodes synthetic medicine rows (as the MySQL cursor returns them) with
+the original per-row serialize_date/serialize_datetime loop plus Flask's
+default JSON provider ("legacy"), and with json_provider's direct
+encoding on the standard library and, when installed, orjson. The
+?format=columnar body (column names once, rows as arrays) and its
+MessagePack form are measured too. Prints the timings and output sizes
+as JSON. No database is needed.
+
+Usage: python benchmarks/bench_serialization.py [--rows 50000] [--runs 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from bench_stats import latency_summary  # noqa: E402
+from json_provider import dumps, encode_value, msgpack, orjson, packb  # noqa: E402
+
+
+def serialize_date(date_obj):
+    """The handlers' original date helper"""
+    if date_obj is None:
+        return None
+    if isinstance(date_obj, datetime):
+        return date_obj.strftime('%Y-%m-%d')
+    if isinstance(date_obj, str):
+        return date_obj
+    return str(date_obj)
+
+
+def serialize_datetime(datetime_obj):
+    """The handlers' original datetime helper"""
+    if datetime_obj is None:
+        return None
+    if isinstance(datetime_obj, datetime):
+        return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
+    return str(datetime_obj)
+
+
+def make_rows(count, seed=7):
+    """Rows shaped like MEDICINE_LIST_QUERY's result"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    rows = []
+    for medicine_id in range(1, count + 1):
+        created = start + timedelta(seconds=rng.randrange(60 * 86400))
+        mfg = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+        rows.append({
+            'medicine_id': medicine_id,
+            'name': f'Medicine {medicine_id}',
+            'company': f'Company {rng.randrange(200)}',
+            'category': rng.choice(['Tablet', 'Syrup', 'Capsule', 'Injection']),
+            'quantity': rng.randrange(500),
+            'price': Decimal(rng.randrange(100, 100000)) / 100,
+            'mfg_date': mfg,
+            'exp_date': mfg + timedelta(days=rng.randrange(180, 1100)),
+            'supplier_id': rng.randrange(1, 50),
+            'supplier_name': f'Supplier {rng.randrange(50)}',
+            'created_at': created,
+            'updated_at': created + timedelta(hours=rng.randrange(1000)),
+        })
+    return rows
+
+
+def legacy_encode(provider, rows):
+    for medicine in rows:
+        medicine['mfg_date'] = serialize_date(medicine.get('mfg_date'))
+        medicine['exp_date'] = serialize_date(medicine.get('exp_date'))
+        medicine['created_at'] = serialize_datetime(medicine.get('created_at'))
+        medicine['updated_at'] = serialize_datetime(medicine.get('updated_at'))
+    return provider.dumps(rows)
+
+
+def stdlib_encode(rows):
+    return json.dumps(rows, default=encode_value, sort_keys=True, separators=(',', ':'))
+
+
+def orjson_encode(rows):
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    return orjson.dumps(rows, default=encode_value, option=options).decode('utf-8')
+
+
+def columnar_encode(columns, tuples):
+    return dumps({'columns': columns, 'rows': tuples})
+
+
+def msgpack_encode(columns, tuples):
+    return packb({'columns': columns, 'rows': tuples})
+
+
+def measure(encode, rows, runs, copy_rows=False):
+    """Time encode(rows) over several runs; copy_rows for encoders that mutate"""
+    samples = []
+    body = None
+    for _ in range(runs):
+        batch = [dict(row) for row in rows] if copy_rows else rows
+        started = time.perf_counter()
+        body = encode(batch)
+        samples.append(time.perf_counter() - started)
+    size = len(body) if isinstance(body, bytes) else len(body.encode('utf-8'))
+    return {'bytes': size, **latency_summary(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    provider = DefaultJSONProvider(Flask(__name__))
+
+    results = {
+        'legacy': measure(lambda batch: legacy_encode(provider, batch), rows, args.runs, copy_rows=True),
+        'stdlib': measure(stdlib_encode, rows, args.runs),
+    }
+    if orjson is not None:
+        results['orjson'] = measure(orjson_encode, rows, args.runs)
+
+    # What a tuple cursor returns for ?format=columnar / ?format=msgpack
+    columns = list(rows[0])
+    tuples = [tuple(row.values()) for row in rows]
+    results['columnar'] = measure(lambda batch: columnar_encode(columns, batch), tuples, args.runs)
+    if msgpack is not None:
+        results['msgpack'] = measure(lambda batch: msgpack_encode(columns, batch), tuples, args.runs)
+
+    baseline = results['legacy']['p50_ms']
+    for name, result in results.items():
+        result['speedup_p50'] = round(baseline / result['p50_ms'], 2) if result['p50_ms'] else None
+
+    print(json.dumps({'rows': args.rows, 'runs': args.runs, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Throughput benchmark: WSGI (app.py) vs ASGI (asgi.py) serving modes
+Drives the read endpoints of one or more running servers with a fixed
+number of concurrent clients and prints requests/second and latency
+percentiles per endpoint as JSON.
+
+Start the servers against the same (seeded) database first, with the
+response cache off so both modes actually hit MySQL, e.g.
+    cd backend && CACHE_MAX_ENTRIES=0 python app.py              # WSGI on :5000
+    cd backend && CACHE_MAX_ENTRIES=0 uvicorn asgi:app --port 5001   # ASGI on :5001
+
+Usage: python benchmarks/bench_serving.py --target wsgi=http://localhost:5000
+       --target asgi=http://localhost:5001 [--concurrency 64] [--duration 20]
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_stats import latency_summary
+
+ENDPOINTS = [
+    '/api/medicines',
+    '/api/sales?cursor=&limit=50',
+    '/api/reports/summary',
+]
+
+
+def client_loop(url, deadline, samples, errors, lock):
+    """Issue requests back to back until the deadline"""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                response.read()
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+        except (urllib.error.URLError, OSError):
+            with lock:
+                errors.append(1)
+
+
+def load(url, concurrency, duration):
+    samples, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client_loop, url, deadline, samples, errors, lock)
+
+    if not samples:
+        return {'requests': 0, 'errors': len(errors)}
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'requests_per_second': round(len(samples) / duration, 1),
+        **latency_summary(samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare API throughput between serving modes')
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=base_url, e.g. wsgi=http://localhost:5000 (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per endpoint per target')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    targets = dict(target.split('=', 1) for target in args.target)
+    results = {}
+    for path in ENDPOINTS:
+        results[path] = {}
+        for name, base_url in targets.items():
+            url = base_url.rstrip('/') + path
+            load(url, min(4, args.concurrency), 2)  # warm-up: fills pools and caches
+            results[path][name] = load(url, args.concurrency, args.duration)
+
+    report = {
+        'concurrency': args.concurrency,
+        'duration_seconds': args.duration,
+        'targets': targets,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""
+Latency statistics shared by the benchmark scripts
+"""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def latency_summary(samples):
+    """p50/p95/p99/max in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {}
+    return {
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
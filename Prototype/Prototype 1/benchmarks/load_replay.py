@@ -0,0 +1,364 @@
+"""
+Replays a realistic, reproducible traffic mix against every API route
+Dashboard polls, list and search lookups, record lifecycles and sale
+POSTs are drawn from a weighted mix with a fixed seed, sent by a pool of
+concurrent clients, and summarized per endpoint (throughput, status
+codes, p50/p95/p99) as JSON. With --baseline the run is compared with an
+earlier report and the script exits 1 if any endpoint got slower than
+the tolerance allows, so it can gate a CI job.
+
+Runs in-process through the Flask test client against the seeded
+benchmark database by default, or against a live server with --url.
+
+Usage: python benchmarks/load_replay.py [--seed] [--requests 5000]
+       [--concurrency 8] [--url http://localhost:5000]
+       [--output run.json] [--baseline previous.json --tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+import seed_data  # noqa: E402
+from bench_stats import latency_summary  # noqa: E402
+
+# The app reads DB_NAME at import time, so point it at the scratch database
+# before anything (seeding included) imports config
+os.environ['DB_NAME'] = seed_data.BENCH_DATABASE
+
+SEARCH_PREFIXES = sorted({base[:n] for base in seed_data.MEDICINE_BASES for n in (3, 5)})
+CUSTOMER_TERMS = [name.lower() for name in seed_data.FIRST_NAMES + seed_data.LAST_NAMES]
+
+
+# ==================== TRAFFIC MIX ====================
+# Each flow is a generator that yields (endpoint, method, path, body) and
+# receives (status, parsed JSON or None) back, so later steps can use ids
+# returned by earlier ones. endpoint is the route label used in the report.
+
+def dashboard_poll(rng, scale):
+    """The dashboard page load: KPI cards, summary, alerts, expiring list, recent activity"""
+    yield 'GET /api/kpis', 'GET', '/api/kpis', None
+    yield 'GET /api/reports/summary', 'GET', '/api/reports/summary', None
+    yield 'GET /api/inventory/alerts', 'GET', '/api/inventory/alerts', None
+    yield 'GET /api/medicines/expiring', 'GET', f'/api/medicines/expiring?days={rng.choice([7, 30, 90])}', None
+    yield 'GET /api/transactions', 'GET', '/api/transactions?cursor=&limit=20', None
+
+
+def medicine_search(rng, scale):
+    term = rng.choice(SEARCH_PREFIXES)
+    yield 'GET /api/medicines/search', 'GET', f'/api/medicines/search?q={term}&limit=20', None
+
+
+def customer_search(rng, scale):
+    term = rng.choice(CUSTOMER_TERMS)
+    yield 'GET /api/customers', 'GET', f'/api/customers?search={term}&limit=20', None
+
+
+def browse_lists(rng, scale):
+    yield 'GET /api/suppliers', 'GET', '/api/suppliers', None
+    if rng.random() < 0.2:
+        # The full list is large at benchmark scale; most clients revalidate it
+        yield 'GET /api/medicines', 'GET', '/api/medicines', None
+
+
+def view_records(rng, scale):
+    yield 'GET /api/medicines/<id>', 'GET', f"/api/medicines/{rng.randint(1, scale['medicines'])}", None
+    yield 'GET /api/customers/<id>', 'GET', f"/api/customers/{rng.randint(1, scale['customers'])}", None
+    yield 'GET /api/sales/<id>', 'GET', f"/api/sales/{rng.randint(1, scale['sales'])}", None
+
+
+def sales_history(rng, scale):
+    status, page = yield 'GET /api/sales', 'GET', '/api/sales?cursor=&limit=50', None
+    if status == 200 and page and page.get('next_cursor'):
+        yield 'GET /api/sales', 'GET', f"/api/sales?cursor={page['next_cursor']}&limit=50", None
+
+
+def point_of_sale(rng, scale):
+    """Ring up a sale; now and then correct its status or void it (which restocks)"""
+    items = []
+    total = 0.0
+    for medicine_id in rng.sample(range(1, scale['medicines'] + 1), rng.randint(1, 3)):
+        quantity = rng.randint(1, 3)
+        unit_price = round(rng.uniform(2, 250), 2)
+        items.append({'medicine_id': medicine_id, 'quantity': quantity,
+                      'unit_price': unit_price, 'subtotal': round(quantity * unit_price, 2)})
+        total += quantity * unit_price
+    sale = {
+        'customer_id': rng.randint(1, scale['customers']),
+        'sale_date': time.strftime('%Y-%m-%d'),
+        'total_amount': round(total, 2),
+        'items': items,
+    }
+    status, created = yield 'POST /api/sales', 'POST', '/api/sales', sale
+    if status != 201 or not created:
+        return
+    roll = rng.random()
+    if roll < 0.2:
+        sale['status'] = 'pending'
+        yield 'PUT /api/sales/<id>', 'PUT', f"/api/sales/{created['sale_id']}", sale
+    elif roll < 0.35:
+        yield 'DELETE /api/sales/<id>', 'DELETE', f"/api/sales/{created['sale_id']}", None
+
+
+def medicine_lifecycle(rng, scale):
+    medicine = {
+        'name': f'Bench {rng.choice(seed_data.MEDICINE_BASES)} {rng.randint(1, 10**6)}',
+        'company': rng.choice(seed_data.COMPANIES),
+        'mfg_date': '2025-01-01',
+        'exp_date': '2027-01-01',
+        'quantity': rng.randint(10, 500),
+        'price': round(rng.uniform(2, 250), 2),
+        'supplier_id': rng.randint(1, scale['suppliers']),
+    }
+    status, created = yield 'POST /api/medicines', 'POST', '/api/medicines', medicine
+    if status != 201 or not created:
+        return
+    medicine['price'] = round(medicine['price'] * 1.05, 2)
+    yield 'PUT /api/medicines/<id>', 'PUT', f"/api/medicines/{created['id']}", medicine
+    yield 'DELETE /api/medicines/<id>', 'DELETE', f"/api/medicines/{created['id']}", None
+
+
+def customer_lifecycle(rng, scale):
+    number = rng.randint(1, 10**6)
+    customer = {'name': f'Bench Customer {number}', 'email': f'bench{number}@email.com',
+                'phone': f'9{rng.randint(100000000, 999999999)}', 'address': 'Main St'}
+    status, created = yield 'POST /api/customers', 'POST', '/api/customers', customer
+    if status != 201 or not created:
+        return
+    customer['address'] = 'Market Rd'
+    yield 'PUT /api/customers/<id>', 'PUT', f"/api/customers/{created['customer_id']}", customer
+    yield 'DELETE /api/customers/<id>', 'DELETE', f"/api/customers/{created['customer_id']}", None
+
+
+def stock_reconciliation(rng, scale):
+    ids = rng.sample(range(1, scale['medicines'] + 1), 20)
+    updates = [{'medicine_id': medicine_id, 'quantity_delta': rng.randint(0, 5)} for medicine_id in ids]
+    yield 'PATCH /api/medicines/bulk', 'PATCH', '/api/medicines/bulk', {'updates': updates}
+
+
+def catalogue_import(rng, scale):
+    lines = ['name,company,mfg_date,exp_date,quantity,price,supplier_id']
+    for _ in range(25):
+        lines.append(f"Import {rng.choice(seed_data.MEDICINE_BASES)} {rng.randint(1, 10**6)},"
+                     f"{rng.choice(seed_data.COMPANIES)},2025-01-01,2027-01-01,"
+                     f"{rng.randint(0, 500)},{rng.uniform(2, 250):.2f},{rng.randint(1, scale['suppliers'])}")
+    yield 'POST /api/medicines/bulk', 'POST', '/api/medicines/bulk?format=csv', '\n'.join(lines) + '\n'
+
+
+def supplier_signup(rng, scale):
+    supplier = {'supplier_name': f'Bench Supplier {rng.randint(1, 10**6)}', 'contact_no': '555-0100'}
+    yield 'POST /api/suppliers', 'POST', '/api/suppliers', supplier
+
+
+def housekeeping(rng, scale):
+    yield 'GET /api/health', 'GET', '/api/health', None
+    yield 'POST /api/auth/login', 'POST', '/api/auth/login', {'email': 'demo@medlocus.com', 'password': 'demo123'}
+
+
+# (weight, flow): roughly a pharmacy front desk with a dashboard open
+TRAFFIC_MIX = [
+    (25, dashboard_poll),
+    (20, medicine_search),
+    (8, customer_search),
+    (6, browse_lists),
+    (10, view_records),
+    (6, sales_history),
+    (15, point_of_sale),
+    (2, medicine_lifecycle),
+    (2, customer_lifecycle),
+    (2, stock_reconciliation),
+    (1, catalogue_import),
+    (1, supplier_signup),
+    (2, housekeeping),
+]
+
+
+# ==================== TRANSPORTS ====================
+
+class TestClientTransport:
+    """Calls the Flask app in-process"""
+
+    def __init__(self):
+        import app as backend
+        seed_data.ensure_bench_database(backend.DB_CONFIG)
+        self.client = backend.app.test_client()
+
+    def send(self, method, path, body):
+        kwargs = {}
+        if isinstance(body, str):
+            kwargs = {'data': body, 'content_type': 'text/csv'}
+        elif body is not None:
+            kwargs = {'json': body}
+        response = self.client.open(path, method=method, **kwargs)
+        return response.status_code, response.get_data()
+
+
+class HTTPTransport:
+    """Calls a running server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method, path, body):
+        headers = {}
+        data = None
+        if isinstance(body, str):
+            data, headers['Content-Type'] = body.encode('utf-8'), 'text/csv'
+        elif body is not None:
+            data, headers['Content-Type'] = json.dumps(body).encode('utf-8'), 'application/json'
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# ==================== RUNNER ====================
+
+class Recorder:
+    """Per-endpoint latencies and status codes, shared by all clients"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, status, elapsed):
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            self.statuses[endpoint][str(status)] += 1
+
+
+def run_client(transport, recorder, rng, scale, flows):
+    weights = [weight for weight, _ in TRAFFIC_MIX]
+    choices = [flow for _, flow in TRAFFIC_MIX]
+    for _ in range(flows):
+        flow = rng.choices(choices, weights=weights)[0](rng, scale)
+        reply = None
+        while True:
+            try:
+                endpoint, method, path, body = flow.send(reply)
+            except StopIteration:
+                break
+            started = time.perf_counter()
+            try:
+                status, raw = transport.send(method, path, body)
+            except OSError:
+                status, raw = 'connection_error', b''
+            recorder.record(endpoint, status, time.perf_counter() - started)
+            try:
+                parsed = json.loads(raw) if raw else None
+            except ValueError:
+                parsed = None
+            reply = (status, parsed)
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for endpoint in sorted(recorder.samples):
+        samples = recorder.samples[endpoint]
+        statuses = dict(recorder.statuses[endpoint])
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            'errors': sum(count for status, count in statuses.items()
+                          if not status.isdigit() or int(status) >= 500),
+            'status_codes': statuses,
+            **latency_summary(samples),
+        }
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return total, endpoints
+
+
+def compare(report, baseline, tolerance):
+    """Endpoints whose p95 grew by more than tolerance versus the baseline report"""
+    regressions = []
+    for endpoint, current in report['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if not before or not before.get('p95_ms') or not current.get('p95_ms'):
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append({'endpoint': endpoint, 'baseline_p95_ms': before['p95_ms'],
+                                'p95_ms': current['p95_ms']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a realistic traffic mix against the API')
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+    parser.add_argument('--requests', type=int, default=5000, help='Flows to replay (each is 1-5 requests)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--random-seed', type=int, default=7)
+    parser.add_argument('--seed', action='store_true', help='(Re)seed the benchmark database first')
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--medicines', type=int, default=100_000)
+    parser.add_argument('--customers', type=int, default=20_000)
+    parser.add_argument('--sales', type=int, default=1_000_000)
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--baseline', help='Earlier report to compare p95 latencies against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth vs baseline (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    scale = {'suppliers': args.suppliers, 'medicines': args.medicines,
+             'customers': args.customers, 'sales': args.sales}
+    if args.seed:
+        seed_data.seed(suppliers=args.suppliers, medicines=args.medicines,
+                       customers=args.customers, sales=args.sales)
+
+    transport = HTTPTransport(args.url) if args.url else TestClientTransport()
+    recorder = Recorder()
+    per_client = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # One RNG per client keeps each client's request sequence reproducible
+        clients = [pool.submit(run_client, transport, recorder, random.Random(args.random_seed + i), scale, flows)
+                   for i, flows in enumerate(per_client)]
+        for client in clients:
+            client.result()
+    elapsed = time.perf_counter() - started
+
+    total, endpoints = summarize(recorder, elapsed)
+    report = {
+        'target': args.url or f'in-process ({seed_data.BENCH_DATABASE})',
+        'flows': args.requests,
+        'concurrency': args.concurrency,
+        'random_seed': args.random_seed,
+        'scale': scale,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': total,
+        'requests_per_second': round(total / elapsed, 1),
+        'endpoints': endpoints,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Deterministic data generator for MEDLOCUS benchmarks
+Creates a scratch database with the application schema (via migrate.py)
+and fills it with reproducible suppliers, medicines, customers, sales and sale items.
+
+Usage: python benchmarks/seed_data.py [--medicines N] [--sales N] [--database NAME]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sales_rollup import rebuild_rollups  # noqa: E402
+
+load_dotenv()
+load_dotenv(dotenv_path='backend/.env')
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST') or os.getenv('DB_HOST', 'localhost'),
+    'user': os.environ.get('DB_USER') or os.getenv('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD') or os.getenv('DB_PASSWORD', ''),
+    'charset': 'utf8mb4'
+}
+
+BENCH_DATABASE = os.getenv('BENCH_DB_NAME', 'medvault_bench')
+BATCH_SIZE = 5000
+
+DROP_ORDER = ['schema_migrations', 'notification_events', 'idempotency_keys', 'daily_medicine_sales_rollup',
+              'daily_sales_rollup', 'sale_items', 'sales', 'customers', 'medicines', 'suppliers']
+
+def ensure_bench_database(db_config):
+    """Exit unless db_config (the app's DB_CONFIG) points at the benchmark database"""
+    if db_config['database'] != BENCH_DATABASE:
+        sys.exit(f"Refusing to run: the app is configured for {db_config['database']!r}, "
+                 f"not the benchmark database {BENCH_DATABASE!r}")
+
+
+MEDICINE_BASES = [
+    'Paracetamol', 'Amoxicillin', 'Ibuprofen', 'Aspirin', 'Cetirizine', 'Omeprazole',
+    'Atorvastatin', 'Metformin', 'Metronidazole', 'Ciprofloxacin', 'Azithromycin',
+    'Losartan', 'Pantoprazole', 'Amlodipine', 'Levothyroxine', 'Clopidogrel',
+]
+STRENGTHS = ['5mg', '10mg', '20mg', '50mg', '100mg', '250mg', '400mg', '500mg']
+COMPANIES = ['PharmaCorp', 'MediCare Labs', 'HealthPlus', 'Global Meds', 'City Medical Supplies']
+FIRST_NAMES = ['Rajesh', 'Anita', 'Suresh', 'Meera', 'Kiran', 'Priya', 'Arjun', 'Neha']
+LAST_NAMES = ['Sharma', 'Patel', 'Kumar', 'Singh', 'Reddy', 'Iyer', 'Das', 'Gupta']
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Pune', 'Hyderabad', 'Chennai']
+
+
+def _insert_batches(cursor, query, rows, label):
+    """executemany in fixed-size batches (sent as multi-row INSERTs)"""
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(query, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        count += len(batch)
+    print(f"[OK] Inserted {count} {label}")
+    return count
+
+
+def generate_suppliers(rng, count):
+    for i in range(1, count + 1):
+        yield (f'Supplier {i:04d}', f'{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}')
+
+
+def generate_medicines(rng, count, suppliers, today):
+    for i in range(1, count + 1):
+        mfg = today - timedelta(days=rng.randint(30, 720))
+        exp = today + timedelta(days=rng.randint(-30, 900))
+        yield (
+            f'{rng.choice(MEDICINE_BASES)} {rng.choice(STRENGTHS)} #{i}',
+            rng.choice(COMPANIES),
+            mfg,
+            exp,
+            rng.randint(0, 500),
+            round(rng.uniform(2, 250), 2),
+            rng.randint(1, suppliers),
+        )
+
+
+def generate_customers(rng, count):
+    for i in range(1, count + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        yield (
+            f'{first} {last} {i}',
+            f'{first.lower()}.{last.lower()}{i}@email.com',
+            f'9{rng.randint(100000000, 999999999)}',
+            f'{rng.randint(1, 999)} Main St, {rng.choice(CITIES)}',
+        )
+
+
+def generate_sales(rng, count, customers, medicines, today, days, items_out):
+    """Yield sale rows; the matching sale_items rows are appended to items_out"""
+    for sale_id in range(1, count + 1):
+        lines = rng.randint(1, 5)
+        total = 0.0
+        for _ in range(lines):
+            quantity = rng.randint(1, 10)
+            unit_price = round(rng.uniform(2, 250), 2)
+            subtotal = round(quantity * unit_price, 2)
+            total += subtotal
+            items_out.append((sale_id, rng.randint(1, medicines), quantity, unit_price, subtotal))
+        status = rng.choices(['completed', 'pending', 'cancelled'], weights=[90, 7, 3])[0]
+        yield (
+            sale_id,
+            rng.randint(1, customers) if rng.random() < 0.9 else None,
+            today - timedelta(days=rng.randint(0, days - 1)),
+            round(total, 2),
+            status,
+            lines,
+        )
+
+
+def seed(database=BENCH_DATABASE, suppliers=50, medicines=100_000, customers=20_000,
+         sales=1_000_000, days=730, seed_value=42):
+    """(Re)create the benchmark database and fill it deterministically"""
+    # Imported here: migrate loads config, which reads DB_NAME once, and the
+    # benchmarks set DB_NAME to the scratch database after importing this module
+    from migrate import migrate
+
+    rng = random.Random(seed_value)
+    today = date.today()
+    connection = mysql.connector.connect(**DB_CONFIG)
+    cursor = connection.cursor()
+    started = time.time()
+
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        cursor.execute(f"USE {database}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in DROP_ORDER:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        # The same migrations as the app database, so the benchmarks see its schema
+        migrate(connection)
+        print(f"[OK] Created schema in {database}")
+
+        _insert_batches(cursor,
+                        "INSERT INTO suppliers (supplier_name, contact_no) VALUES (%s, %s)",
+                        generate_suppliers(rng, suppliers), 'suppliers')
+        _insert_batches(cursor,
+                        """INSERT INTO medicines (name, company, mfg_date, exp_date, quantity, price, supplier_id)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                        generate_medicines(rng, medicines, suppliers, today), 'medicines')
+        _insert_batches(cursor,
+                        "INSERT INTO customers (name, email, phone, address) VALUES (%s, %s, %s, %s)",
+                        generate_customers(rng, customers), 'customers')
+        connection.commit()
+
+        # Sales and their items are flushed together so the item buffer
+        # never holds more than one batch worth of sales
+        sale_query = """INSERT INTO sales (sale_id, customer_id, sale_date, total_amount, status, item_count)
+                        VALUES (%s, %s, %s, %s, %s, %s)"""
+        item_query = """INSERT INTO sale_items (sale_id, medicine_id, quantity, unit_price, subtotal)
+                        VALUES (%s, %s, %s, %s, %s)"""
+        items = []
+        sale_batch = []
+        sale_total = item_total = 0
+        for row in generate_sales(rng, sales, customers, medicines, today, days, items):
+            sale_batch.append(row)
+            if len(sale_batch) >= BATCH_SIZE:
+                cursor.executemany(sale_query, sale_batch)
+                cursor.executemany(item_query, items)
+                connection.commit()
+                sale_total += len(sale_batch)
+                item_total += len(items)
+                sale_batch = []
+                items.clear()
+        if sale_batch:
+            cursor.executemany(sale_query, sale_batch)
+            cursor.executemany(item_query, items)
+            sale_total += len(sale_batch)
+            item_total += len(items)
+        connection.commit()
+        print(f"[OK] Inserted {sale_total} sales and {item_total} sale items")
+
+        days, medicine_days = rebuild_rollups(connection)
+        print(f"[OK] Built rollups ({days} days, {medicine_days} day/medicine rows)")
+
+        cursor.execute("ANALYZE TABLE suppliers, medicines, customers, sales, sale_items, "
+                       "daily_sales_rollup, daily_medicine_sales_rollup")
+        cursor.fetchall()
+        print(f"\nSeeded {database} in {time.time() - started:.1f}s")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seed a MEDLOCUS benchmark database')
+    parser.add_argument('--database', default=BENCH_DATABASE)
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--medicines', type=int, default=100_000)
+    parser.add_argument('--customers', type=int, default=20_000)
+    parser.add_argument('--sales', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=730, help='Spread sales over this many past days')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    try:
+        seed(args.database, args.suppliers, args.medicines, args.customers,
+             args.sales, args.days, args.seed)
+    except Error as e:
+        print(f"\nERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+-- Base schema: suppliers and medicines as the first release created them
+-- (schema.sql without sample data); later changes are separate migrations
+
+-- Table: suppliers
+CREATE TABLE IF NOT EXISTS suppliers (
+    supplier_id INT AUTO_INCREMENT PRIMARY KEY,
+    supplier_name VARCHAR(100) NOT NULL,
+    contact_no VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_supplier_name (supplier_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Table: medicines
+CREATE TABLE IF NOT EXISTS medicines (
+    medicine_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    company VARCHAR(100) NOT NULL,
+    mfg_date DATE NOT NULL,
+    exp_date DATE NOT NULL,
+    quantity INT NOT NULL CHECK (quantity >= 0),
+    price DECIMAL(10, 2) NOT NULL CHECK (price >= 0),
+    supplier_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id) ON DELETE RESTRICT,
+    INDEX idx_name (name),
+    INDEX idx_company (company),
+    INDEX idx_exp_date (exp_date),
+    INDEX idx_supplier (supplier_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,23 @@
+-- Composite indexes for the list queries that ended in a filesort
+
+-- /api/sales?status=...: status equality followed by the list order
+-- (sale_date DESC, created_at DESC, sale_id DESC), so a filtered page and
+-- its keyset seek read the index in order and stop after LIMIT rows.
+-- idx_status is a prefix of it and goes.
+ALTER TABLE sales ADD INDEX idx_status_sale_date_created (status, sale_date, created_at, sale_id);
+ALTER TABLE sales DROP INDEX idx_status;
+
+-- idx_sale_date is a prefix of idx_sale_date_created (the unfiltered
+-- /api/sales order); databases created before keyset pagination may
+-- lack the latter
+ALTER TABLE sales ADD INDEX idx_sale_date_created (sale_date, created_at, sale_id);
+ALTER TABLE sales DROP INDEX idx_sale_date;
+
+-- /api/transactions orders by (updated_at, medicine_id); InnoDB appends the
+-- primary key to every secondary index, so idx_updated_at serves both
+ALTER TABLE medicines ADD INDEX idx_updated_at (updated_at);
+
+-- Alert candidates (quantity < 5 OR exp_date <= window end): an index on
+-- each side of the OR lets MySQL merge idx_quantity with idx_exp_date
+-- instead of scanning medicines
+ALTER TABLE medicines ADD INDEX idx_quantity (quantity);
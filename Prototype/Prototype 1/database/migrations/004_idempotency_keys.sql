@@ -0,0 +1,15 @@
+-- Idempotency-Key support for POST /api/sales (see backend/idempotency.py)
+
+-- Table: idempotency_keys (one row per key, holding the stored response
+-- until expires_at; idx_expires_at serves the expiry sweep)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    endpoint VARCHAR(100) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body MEDIUMTEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (endpoint, idempotency_key),
+    INDEX idx_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,5 @@
+-- FULLTEXT indexes behind /api/medicines/search and the customer search
+-- (MATCH ... AGAINST needs an index covering exactly the matched columns)
+ALTER TABLE medicines ADD FULLTEXT INDEX ft_name_company (name, company);
+ALTER TABLE suppliers ADD FULLTEXT INDEX ft_supplier_name (supplier_name);
+ALTER TABLE customers ADD FULLTEXT INDEX ft_customer_search (name, email, phone);
@@ -0,0 +1,10 @@
+-- sales.item_count: number of sale_items rows, stored by add_sale so the
+-- sales list does not join sale_items to count them
+
+ALTER TABLE sales ADD COLUMN item_count INT NOT NULL DEFAULT 0 AFTER notes;
+
+-- Backfill the sales booked before the column existed
+UPDATE sales s
+LEFT JOIN (SELECT sale_id, COUNT(*) AS item_count FROM sale_items GROUP BY sale_id) si
+    ON si.sale_id = s.sale_id
+SET s.item_count = COALESCE(si.item_count, 0);
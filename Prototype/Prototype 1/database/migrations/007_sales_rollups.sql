@@ -0,0 +1,38 @@
+-- Daily sales rollups read by the reports endpoints (see backend/sales_rollup.py),
+-- built from the sales already in the database
+
+-- Table: daily_sales_rollup (completed sales totals per day, read by reports)
+CREATE TABLE IF NOT EXISTS daily_sales_rollup (
+    sale_date DATE PRIMARY KEY,
+    total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    sale_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Table: daily_medicine_sales_rollup (completed quantity/revenue per day per medicine)
+CREATE TABLE IF NOT EXISTS daily_medicine_sales_rollup (
+    sale_date DATE NOT NULL,
+    medicine_id INT NOT NULL,
+    quantity_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, medicine_id),
+    INDEX idx_medicine (medicine_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Rebuild both from sales/sale_items (as rebuild_rollups does), so a re-run
+-- after a failure starts from empty tables
+DELETE FROM daily_sales_rollup;
+DELETE FROM daily_medicine_sales_rollup;
+
+INSERT INTO daily_sales_rollup (sale_date, total_amount, sale_count)
+SELECT sale_date, SUM(total_amount), COUNT(*)
+FROM sales
+WHERE status = 'completed'
+GROUP BY sale_date;
+
+INSERT INTO daily_medicine_sales_rollup (sale_date, medicine_id, quantity_sold, revenue)
+SELECT s.sale_date, si.medicine_id, SUM(si.quantity), SUM(si.subtotal)
+FROM sales s
+JOIN sale_items si ON si.sale_id = s.sale_id
+WHERE s.status = 'completed'
+GROUP BY s.sale_date, si.medicine_id;
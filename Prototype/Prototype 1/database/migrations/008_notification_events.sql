@@ -0,0 +1,12 @@
+-- Push notification events shared between server processes (see backend/notifications.py)
+
+-- Table: notification_events (written after each committed change, polled
+-- by every process's EventFeed; the id is the event id clients resume from,
+-- idx_created_at serves the retention sweep)
+CREATE TABLE IF NOT EXISTS notification_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -1,6 +1,8 @@
 -- Medical Storage Management System - Database Schema
 -- Database: medvault_db
 -- Normalized to 3NF
+-- Clean install only (drops the tables); upgrade an existing database
+-- in place with migrate.py, which applies database/migrations
 
 -- Create database
 CREATE DATABASE IF NOT EXISTS medvault_db;
@@ -19,7 +21,8 @@ CREATE TABLE suppliers (
     contact_no VARCHAR(20) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_supplier_name (supplier_name)
+    INDEX idx_supplier_name (supplier_name),
+    FULLTEXT INDEX ft_supplier_name (supplier_name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Table: medicines
@@ -40,7 +43,10 @@ CREATE TABLE medicines (
     INDEX idx_name (name),
     INDEX idx_company (company),
     INDEX idx_exp_date (exp_date),
-    INDEX idx_supplier (supplier_id)
+    INDEX idx_quantity (quantity),
+    INDEX idx_updated_at (updated_at),
+    INDEX idx_supplier (supplier_id),
+    FULLTEXT INDEX ft_name_company (name, company)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Sample data insertion
@@ -1,5 +1,5 @@
 -- Extended Schema for MEDLOCUS - Customers and Sales
--- Run this after the base schema
+-- Run this after the base schema (or use migrate.py, which applies both)
 
 USE medvault_db;
 
@@ -13,7 +13,8 @@ CREATE TABLE IF NOT EXISTS customers (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_name (name),
-    INDEX idx_email (email)
+    INDEX idx_email (email),
+    FULLTEXT INDEX ft_customer_search (name, email, phone)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Table: sales (transactions)
@@ -24,12 +25,13 @@ CREATE TABLE IF NOT EXISTS sales (
     total_amount DECIMAL(10, 2) NOT NULL CHECK (total_amount >= 0),
     status ENUM('completed', 'pending', 'cancelled') DEFAULT 'completed',
     notes TEXT,
+    item_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE SET NULL,
-    INDEX idx_sale_date (sale_date),
-    INDEX idx_customer (customer_id),
-    INDEX idx_status (status)
+    INDEX idx_sale_date_created (sale_date, created_at, sale_id),
+    INDEX idx_status_sale_date_created (status, sale_date, created_at, sale_id),
+    INDEX idx_customer (customer_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Table: sale_items (many-to-many relationship between sales and medicines)
@@ -46,6 +48,37 @@ CREATE TABLE IF NOT EXISTS sale_items (
     INDEX idx_medicine (medicine_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Table: daily_sales_rollup (completed sales totals per day, read by reports)
+CREATE TABLE IF NOT EXISTS daily_sales_rollup (
+    sale_date DATE PRIMARY KEY,
+    total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    sale_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Table: daily_medicine_sales_rollup (completed quantity/revenue per day per medicine)
+CREATE TABLE IF NOT EXISTS daily_medicine_sales_rollup (
+    sale_date DATE NOT NULL,
+    medicine_id INT NOT NULL,
+    quantity_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, medicine_id),
+    INDEX idx_medicine (medicine_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Table: idempotency_keys (stored POST /api/sales responses for Idempotency-Key retries)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    endpoint VARCHAR(100) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body MEDIUMTEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (endpoint, idempotency_key),
+    INDEX idx_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Sample customers
 INSERT INTO customers (name, email, phone, address) VALUES
 ('Rajesh Sharma', 'rajesh.sharma@email.com', '9876543210', '123 Main St, Mumbai'),
@@ -78,4 +111,23 @@ INSERT INTO sale_items (sale_id, medicine_id, quantity, unit_price, subtotal) VA
 (5, 5, 4, 20.50, 82.00),
 (5, 8, 2, 35.25, 70.50);
 
+-- Denormalized line count used by the sales listing
+UPDATE sales s
+JOIN (SELECT sale_id, COUNT(*) AS item_count FROM sale_items GROUP BY sale_id) si
+    ON si.sale_id = s.sale_id
+SET s.item_count = si.item_count;
+
+-- Build the report rollups from the sample sales
+INSERT INTO daily_sales_rollup (sale_date, total_amount, sale_count)
+SELECT sale_date, SUM(total_amount), COUNT(*)
+FROM sales
+WHERE status = 'completed'
+GROUP BY sale_date;
+
+INSERT INTO daily_medicine_sales_rollup (sale_date, medicine_id, quantity_sold, revenue)
+SELECT s.sale_date, si.medicine_id, SUM(si.quantity), SUM(si.subtotal)
+FROM sales s
+JOIN sale_items si ON si.sale_id = s.sale_id
+WHERE s.status = 'completed'
+GROUP BY s.sale_date, si.medicine_id;
 
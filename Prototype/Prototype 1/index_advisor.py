@@ -0,0 +1,339 @@
+"""
+Index advisor for the MEDLOCUS API queries
+Replays the read-only API routes through Flask's test client against the
+configured database and collects every SQL statement app.py executes for
+them (QueryProfiler.collector), then runs EXPLAIN on each distinct
+SELECT. Steps that scan a whole table, sort with a filesort or build a
+temporary table are reported, with a composite index derived from the
+statement: the table's equality predicates, then its ORDER BY columns
+(or else its first range predicate). Candidates an existing index
+already serves are left out; InnoDB appends the primary key to every
+secondary index, so that counts too.
+
+--write saves the proposals as the next file in database/migrations,
+--apply also runs it (see migrate.py). Review a written migration before
+committing it: the advisor reads SQL text, not the optimizer's mind, and
+on a small database MySQL may prefer a scan whatever the indexes.
+
+Usage: python index_advisor.py [--write | --apply]
+"""
+
+import argparse
+import os
+import re
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+# Statements are collected through the query profiler, so it has to be on
+os.environ['PROFILING_ENABLED'] = 'True'
+
+from mysql.connector import Error  # noqa: E402
+
+import app as api  # noqa: E402
+from migrate import MIGRATIONS_DIR, connect, discover_migrations, migrate  # noqa: E402
+
+# GET requests replayed to collect statements; {medicine_id} and {sale_id}
+# are filled with existing ids, and a returned next_cursor is followed once
+ADVISOR_ROUTES = [
+    '/api/suppliers',
+    '/api/medicines',
+    '/api/medicines/{medicine_id}',
+    '/api/medicines/search?q=para',
+    '/api/medicines/search?q=pa',
+    '/api/medicines/expiring?days=30',
+    '/api/transactions?limit=10',
+    '/api/transactions?limit=10&cursor=',
+    '/api/kpis',
+    '/api/inventory/alerts',
+    '/api/customers',
+    '/api/customers?search=sharma',
+    '/api/customers?search=ra',
+    '/api/sales',
+    '/api/sales?limit=20&cursor=',
+    '/api/sales?status=completed',
+    '/api/sales?status=pending&limit=20&cursor=',
+    '/api/sales?search=1',
+    '/api/sales/{sale_id}',
+    '/api/reports/summary',
+]
+
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.I)
+EQUALITY = re.compile(r"(?:\b(\w+)\.)?\b(\w+)\s*=\s*(?:%s|'[^']*'|\d+\b)")
+RANGE = re.compile(r'(?:\b(\w+)\.)?\b(\w+)\s*(?:<=|>=|<|>|\bBETWEEN\b|\bLIKE\b)', re.I)
+ORDER_BY = re.compile(r'\bORDER\s+BY\s+(.+?)(?=\bLIMIT\b|\)|$)', re.I | re.S)
+ORDER_ITEM = re.compile(r'^(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?$', re.I)
+SQL_WORDS = {
+    'on', 'where', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'natural', 'straight_join',
+    'order', 'group', 'having', 'limit', 'union', 'using', 'for', 'lock', 'window',
+}
+
+
+def sample_ids():
+    """Existing ids for the per-row routes ({} entries are None on an empty table)"""
+    with api.db_connection() as connection:
+        if not connection:
+            raise Error(msg='Database connection failed')
+        cursor = connection.cursor()
+        cursor.execute("SELECT (SELECT MIN(medicine_id) FROM medicines), (SELECT MIN(sale_id) FROM sales)")
+        medicine_id, sale_id = cursor.fetchone()
+        cursor.close()
+    return {'medicine_id': medicine_id, 'sale_id': sale_id}
+
+
+def with_cursor(url, token):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query['cursor'] = token
+    return f'{parts.path}?{urlencode(query)}'
+
+
+def replay(client, url, statements):
+    """GET url and add the SELECTs it ran to statements; returns the JSON body (or None)"""
+    collected = []
+    api.query_profiler.collector = collected
+    try:
+        response = client.get(url)
+        response.get_data()  # runs streamed bodies to completion
+    finally:
+        api.query_profiler.collector = None
+    for operation, params in collected:
+        key = ' '.join(str(operation).split())
+        if not key.upper().startswith(('SELECT', 'WITH')):
+            continue
+        entry = statements.setdefault(key, {'operation': operation, 'params': params, 'routes': []})
+        if url not in entry['routes']:
+            entry['routes'].append(url)
+    return response.get_json(silent=True)
+
+
+def collect_statements():
+    """{normalized SQL: {'operation', 'params', 'routes'}} for the SELECTs the replayed routes run"""
+    ids = sample_ids()
+    client = api.app.test_client()
+    statements = {}
+    for route in ADVISOR_ROUTES:
+        if any(f'{{{name}}}' in route and value is None for name, value in ids.items()):
+            print(f"Skipping {route} (no rows to look up)")
+            continue
+        url = route.format(**ids)
+        body = replay(client, url, statements)
+        if 'cursor=' in url and isinstance(body, dict) and body.get('next_cursor'):
+            # The second page adds the keyset predicate
+            replay(client, with_cursor(url, body['next_cursor']), statements)
+    return statements
+
+
+def load_schema(connection):
+    """(columns, indexes): {table: set of columns} and {table: {index: [columns]}} (no FULLTEXT)"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    columns = {}
+    for table, column in cursor.fetchall():
+        columns.setdefault(table, set()).add(column)
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE <> 'FULLTEXT'
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)
+    indexes = {}
+    for table, index, column in cursor.fetchall():
+        indexes.setdefault(table, {}).setdefault(index, []).append(column)
+    cursor.close()
+    return columns, indexes
+
+
+def explain(connection, operation, params):
+    cursor = connection.cursor(dictionary=True, buffered=True)
+    cursor.execute(f"EXPLAIN {operation}", params)
+    steps = cursor.fetchall()
+    cursor.close()
+    return steps
+
+
+def step_problems(step):
+    """What is costly about one EXPLAIN row"""
+    extra = step.get('Extra') or ''
+    problems = []
+    if step.get('type') == 'ALL':
+        problems.append('full table scan')
+    if 'Using filesort' in extra:
+        problems.append('filesort')
+    if 'Using temporary' in extra:
+        problems.append('temporary table')
+    return problems
+
+
+def table_aliases(sql, columns):
+    """{alias or table name: table} for the known tables a statement reads"""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        if table not in columns:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_WORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _resolve(alias, column, table, aliases, columns):
+    """True if alias.column (alias may be empty) is a column of table in this statement"""
+    if column not in columns[table]:
+        return False
+    if alias:
+        return aliases.get(alias) == table
+    # Unqualified: only if no other table of the statement has the column
+    return all(column not in columns[other] for other in set(aliases.values()) - {table})
+
+
+def _unique(names):
+    return list(dict.fromkeys(names))
+
+
+def candidate_index(sql, table, aliases, columns, indexes):
+    """Columns of a composite index for table's part of sql, or [] if none would help"""
+    # Predicates are looked for after the select list (which may hold CASE/SUM comparisons)
+    predicates = sql[max(sql.upper().find(' FROM '), 0):]
+    equal = _unique(column for alias, column in EQUALITY.findall(predicates)
+                    if _resolve(alias, column, table, aliases, columns))
+    primary = indexes.get(table, {}).get('PRIMARY', [])
+    if primary and set(primary) <= set(equal):
+        return []  # a primary key lookup reads one row
+
+    order = []
+    for clause in ORDER_BY.findall(sql):
+        items = [ORDER_ITEM.match(item.strip()) for item in clause.split(',')]
+        if items and all(item and _resolve(item.group(1), item.group(2), table, aliases, columns)
+                         for item in items):
+            order = [item.group(2) for item in items]
+            break
+    ranges = _unique(column for alias, column in RANGE.findall(predicates)
+                     if _resolve(alias, column, table, aliases, columns))
+    return _unique(equal + (order or ranges[:1]))
+
+
+def is_covered(candidate, table, indexes):
+    """True if an existing index starts with the candidate columns"""
+    table_indexes = indexes.get(table, {})
+    primary = table_indexes.get('PRIMARY', [])
+    for name, index_columns in table_indexes.items():
+        if name != 'PRIMARY':
+            index_columns = index_columns + [column for column in primary if column not in index_columns]
+        if index_columns[:len(candidate)] == candidate:
+            return True
+    return False
+
+
+def index_name(columns):
+    return ('idx_' + '_'.join(columns))[:64]
+
+
+def analyze(connection, statements):
+    """Report every costly EXPLAIN step; returns {(table, columns): routes} of proposed indexes"""
+    columns, indexes = load_schema(connection)
+    proposals = {}
+    for key, entry in statements.items():
+        try:
+            steps = explain(connection, entry['operation'], entry['params'])
+        except Error as e:
+            print(f"\nEXPLAIN failed for {key[:100]}: {e}")
+            continue
+        aliases = table_aliases(key, columns)
+        findings = []
+        for step in steps:
+            problems = step_problems(step)
+            if not problems:
+                continue
+            table = aliases.get(step.get('table'))
+            note = 'no index helps (derived or aggregate result)'
+            if table:
+                candidate = candidate_index(key, table, aliases, columns, indexes)
+                if not candidate:
+                    note = 'no index helps (reads every row or a single row)'
+                elif is_covered(candidate, table, indexes):
+                    note = f"already served by an index on ({', '.join(candidate)}); likely a small table"
+                else:
+                    note = f"propose {index_name(candidate)} ({', '.join(candidate)})"
+                    routes = proposals.setdefault((table, tuple(candidate)), [])
+                    routes.extend(route for route in entry['routes'] if route not in routes)
+            findings.append(f"    {step.get('table')}: type={step.get('type')} key={step.get('key')} "
+                            f"rows={step.get('rows')} {', '.join(problems)} -> {note}")
+        if findings:
+            print(f"\n{', '.join(entry['routes'])}")
+            print(f"  {key[:160]}{'...' if len(key) > 160 else ''}")
+            print('\n'.join(findings))
+    return prune(proposals)
+
+
+def prune(proposals):
+    """Fold each proposal into the longest one on the same table it is a leading prefix of"""
+    kept = {}
+    for (table, candidate), routes in proposals.items():
+        widest = max((other for other_table, other in proposals
+                      if other_table == table and other[:len(candidate)] == candidate), key=len)
+        target = kept.setdefault((table, widest), [])
+        target.extend(route for route in routes if route not in target)
+    return kept
+
+
+def proposal_sql(proposals):
+    statements = []
+    for (table, candidate), routes in sorted(proposals.items()):
+        statements.append(f"-- {', '.join(routes)}\n"
+                          f"ALTER TABLE {table} ADD INDEX {index_name(candidate)} ({', '.join(candidate)});")
+    return '\n\n'.join(statements)
+
+
+def write_migration(proposals):
+    """Save the proposals as the next numbered migration; returns its path"""
+    migrations = discover_migrations()
+    version = (migrations[-1][0] if migrations else 0) + 1
+    path = os.path.join(MIGRATIONS_DIR, f'{version:03d}_advisor_indexes.sql')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("-- Composite indexes proposed by index_advisor.py for the routes listed above each\n\n")
+        f.write(proposal_sql(proposals) + '\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--write', action='store_true', help='save the proposals as a new migration file')
+    group.add_argument('--apply', action='store_true', help='save the proposals as a migration and run it')
+    args = parser.parse_args()
+
+    try:
+        statements = collect_statements()
+        print(f"Collected {len(statements)} distinct SELECT statements from {len(ADVISOR_ROUTES)} routes")
+        with api.db_connection() as connection:
+            if not connection:
+                raise Error(msg='Database connection failed')
+            proposals = analyze(connection, statements)
+    except Error as e:
+        print(f"\nERROR: {e}")
+        sys.exit(1)
+
+    if not proposals:
+        print("\nNo new indexes to propose.")
+        return
+    print("\nProposed indexes:\n")
+    print(proposal_sql(proposals))
+
+    if args.write or args.apply:
+        path = write_migration(proposals)
+        print(f"\n[OK] Wrote {os.path.relpath(path, ROOT_DIR)}")
+    if args.apply:
+        connection = connect()
+        try:
+            migrate(connection)
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
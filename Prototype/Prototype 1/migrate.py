@@ -0,0 +1,180 @@
+"""
+Versioned schema migrations for MEDLOCUS
+Applies the numbered SQL files in database/migrations (001_*.sql,
+002_*.sql, ...) that are not yet recorded in the schema_migrations table,
+in order. Nothing is dropped and recreated: an existing database keeps
+its data and only gets the migrations it is missing.
+
+MySQL commits DDL as it goes, so a migration cannot be rolled back as a
+whole. Statements are written to be safe to re-run (CREATE TABLE IF NOT
+EXISTS; adding an index that exists or dropping one that is gone is
+skipped), so after a failure fix the file and run it again.
+
+Usage: python migrate.py [--status] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+import mysql.connector
+from mysql.connector import Error, errorcode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from config import DB_CONFIG  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Errors meaning a statement's change is already in place
+ALREADY_APPLIED = {
+    errorcode.ER_DUP_KEYNAME,             # ADD INDEX: index exists
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY,  # DROP INDEX: index is gone
+    errorcode.ER_DUP_FIELDNAME,           # ADD COLUMN: column exists
+}
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """(version, name, path) for every migration file, in version order"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration version in {directory}")
+    return migrations
+
+
+def split_statements(sql):
+    """Statements of a migration file (-- comment lines dropped, split on a trailing ';')"""
+    statements, current = [], []
+    for line in sql.splitlines():
+        if not line.strip() or line.lstrip().startswith('--'):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(';'):
+            statements.append('\n'.join(current).rstrip().rstrip(';'))
+            current = []
+    if current:
+        statements.append('\n'.join(current))
+    return statements
+
+
+def file_checksum(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def applied_migrations(cursor):
+    """{version: checksum} of the migrations recorded as applied"""
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def apply_migration(connection, version, name, path):
+    """Run one migration file and record it"""
+    with open(path, encoding='utf-8') as f:
+        statements = split_statements(f.read())
+    cursor = connection.cursor()
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except Error as e:
+            if e.errno not in ALREADY_APPLIED:
+                raise
+            print(f"    [SKIP] {e.msg}")
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (version, name, file_checksum(path))
+    )
+    connection.commit()
+    cursor.close()
+
+
+def migrate(connection, dry_run=False, directory=MIGRATIONS_DIR):
+    """Apply every pending migration to the connection's database; returns [(version, name)] applied"""
+    cursor = connection.cursor()
+    applied = applied_migrations(cursor)
+    cursor.close()
+
+    done = []
+    for version, name, path in discover_migrations(directory):
+        if version in applied:
+            if applied[version] != file_checksum(path):
+                print(f"[WARN] {version:03d}_{name} changed after it was applied; it is not re-run")
+            continue
+        print(f"{'Would apply' if dry_run else 'Applying'} {version:03d}_{name}...")
+        if not dry_run:
+            apply_migration(connection, version, name, path)
+            print(f"[OK] {version:03d}_{name} applied")
+        done.append((version, name))
+    return done
+
+
+def connect(database=DB_CONFIG['database']):
+    """Connection to the app database, creating the database if needed"""
+    server_config = {key: value for key, value in DB_CONFIG.items() if key != 'database'}
+    connection = mysql.connector.connect(**server_config)
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+    cursor.execute(f"USE `{database}`")
+    cursor.close()
+    return connection
+
+
+def print_status(connection):
+    cursor = connection.cursor()
+    applied = applied_migrations(cursor)
+    cursor.close()
+    for version, name, path in discover_migrations():
+        if version not in applied:
+            state = 'pending'
+        elif applied[version] != file_checksum(path):
+            state = 'applied (file changed since)'
+        else:
+            state = 'applied'
+        print(f"  {version:03d}_{name}: {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--status', action='store_true', help='list migrations and whether they are applied')
+    parser.add_argument('--dry-run', action='store_true', help='list the pending migrations without running them')
+    args = parser.parse_args()
+
+    connection = None
+    try:
+        connection = connect()
+        if args.status:
+            print_status(connection)
+            return
+        done = migrate(connection, dry_run=args.dry_run)
+        if not done:
+            print("Database schema is up to date.")
+    except Error as e:
+        print(f"\nERROR: {e}")
+        sys.exit(1)
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
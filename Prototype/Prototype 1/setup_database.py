@@ -1,6 +1,7 @@
 """
 Database Setup Script for Medical Storage Management System
-This script will create the database and tables automatically.
+This script will create the database, apply the schema migrations
+(see migrate.py) and load sample data into an empty database.
 """
 
 import mysql.connector
@@ -8,6 +9,8 @@ from mysql.connector import Error
 import os
 from dotenv import load_dotenv
 
+from migrate import migrate
+
 # Load environment variables from .env file if it exists
 load_dotenv()
 
@@ -24,7 +27,7 @@ DB_CONFIG = {
 }
 
 def setup_database():
-    """Create database and tables"""
+    """Create the database, apply pending migrations and insert sample data if empty"""
     connection = None
     
     try:
@@ -44,47 +47,15 @@ def setup_database():
         cursor.execute("USE medvault_db")
         print("[OK] Database created/selected successfully")
         
-        # Drop existing tables
-        print("Dropping existing tables (if any)...")
-        cursor.execute("DROP TABLE IF EXISTS medicines")
-        cursor.execute("DROP TABLE IF EXISTS suppliers")
-        
-        # Create suppliers table
-        print("Creating suppliers table...")
-        cursor.execute("""
-            CREATE TABLE suppliers (
-                supplier_id INT AUTO_INCREMENT PRIMARY KEY,
-                supplier_name VARCHAR(100) NOT NULL,
-                contact_no VARCHAR(20) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_supplier_name (supplier_name)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        print("[OK] Suppliers table created")
+        # Create or upgrade the tables (never drops existing data)
+        print("Applying schema migrations...")
+        applied = migrate(connection)
+        print(f"[OK] Schema up to date ({len(applied)} migration(s) applied)")
         
-        # Create medicines table
-        print("Creating medicines table...")
-        cursor.execute("""
-            CREATE TABLE medicines (
-                medicine_id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                company VARCHAR(100) NOT NULL,
-                mfg_date DATE NOT NULL,
-                exp_date DATE NOT NULL,
-                quantity INT NOT NULL CHECK (quantity >= 0),
-                price DECIMAL(10, 2) NOT NULL CHECK (price >= 0),
-                supplier_id INT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id) ON DELETE RESTRICT,
-                INDEX idx_name (name),
-                INDEX idx_company (company),
-                INDEX idx_exp_date (exp_date),
-                INDEX idx_supplier (supplier_id)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        print("[OK] Medicines table created")
+        cursor.execute("SELECT COUNT(*) FROM suppliers")
+        if cursor.fetchone()[0] > 0:
+            print("[OK] Sample data already present, leaving existing rows untouched")
+            return
         
         # Insert sample suppliers
         print("Inserting sample suppliers...")
@@ -126,7 +97,7 @@ def setup_database():
         print("SUCCESS! Database setup completed successfully!")
         print("="*60)
         print("\nDatabase: medvault_db")
-        print("Tables: suppliers, medicines")
+        print("Tables: suppliers, medicines, customers, sales, sale_items, report rollups")
         print("Sample data: 5 suppliers, 8 medicines")
         print("\nYou can now use the application.")
         print("Flask server should be running on http://localhost:5000")
@@ -6,8 +6,12 @@ Adds customers and sales tables
 import mysql.connector
 from mysql.connector import Error
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from sales_rollup import rebuild_rollups
+
 load_dotenv()
 load_dotenv(dotenv_path='backend/.env')
 
@@ -19,6 +23,42 @@ DB_CONFIG = {
     'charset': 'utf8mb4'
 }
 
+def add_index_if_missing(cursor, table, index_name, columns, kind='INDEX'):
+    """Create an index (or FULLTEXT INDEX) on an existing table unless it is already there"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index_name))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {index_name} ({columns})")
+        print(f"[OK] Added index {index_name} on {table}")
+
+
+def add_column_if_missing(cursor, table, column, definition):
+    """Add a column to an existing table; returns True if it was added"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"[OK] Added column {column} to {table}")
+        return True
+    return False
+
+
+def backfill_sale_item_counts(cursor):
+    """Recompute sales.item_count from sale_items in one grouped pass"""
+    cursor.execute("""
+        UPDATE sales s
+        LEFT JOIN (
+            SELECT sale_id, COUNT(*) AS item_count FROM sale_items GROUP BY sale_id
+        ) si ON si.sale_id = s.sale_id
+        SET s.item_count = COALESCE(si.item_count, 0)
+    """)
+    print(f"[OK] Backfilled item_count for {cursor.rowcount} sales")
+
+
 def setup_extended_database():
     """Create customers and sales tables"""
     connection = None
@@ -39,7 +79,8 @@ def setup_extended_database():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 INDEX idx_name (name),
-                INDEX idx_email (email)
+                INDEX idx_email (email),
+                FULLTEXT INDEX ft_customer_search (name, email, phone)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
         print("[OK] Customers table created")
@@ -53,12 +94,13 @@ def setup_extended_database():
                 total_amount DECIMAL(10, 2) NOT NULL CHECK (total_amount >= 0),
                 status ENUM('completed', 'pending', 'cancelled') DEFAULT 'completed',
                 notes TEXT,
+                item_count INT NOT NULL DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE SET NULL,
-                INDEX idx_sale_date (sale_date),
-                INDEX idx_customer (customer_id),
-                INDEX idx_status (status)
+                INDEX idx_sale_date_created (sale_date, created_at, sale_id),
+                INDEX idx_status_sale_date_created (status, sale_date, created_at, sale_id),
+                INDEX idx_customer (customer_id)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
         print("[OK] Sales table created")
@@ -80,6 +122,22 @@ def setup_extended_database():
         """)
         print("[OK] Sale items table created")
         
+        # Indexes for keyset pagination on tables created by older versions
+        print("Checking pagination indexes...")
+        add_index_if_missing(cursor, 'sales', 'idx_sale_date_created', 'sale_date, created_at, sale_id')
+        add_index_if_missing(cursor, 'medicines', 'idx_updated_at', 'updated_at')
+        
+        # Full-text indexes used by medicine and customer search
+        print("Checking search indexes...")
+        add_index_if_missing(cursor, 'medicines', 'ft_name_company', 'name, company', 'FULLTEXT INDEX')
+        add_index_if_missing(cursor, 'suppliers', 'ft_supplier_name', 'supplier_name', 'FULLTEXT INDEX')
+        add_index_if_missing(cursor, 'customers', 'ft_customer_search', 'name, email, phone', 'FULLTEXT INDEX')
+        
+        # Denormalized sale line count (replaces a per-row COUNT subquery)
+        print("Checking sales.item_count...")
+        if add_column_if_missing(cursor, 'sales', 'item_count', 'INT NOT NULL DEFAULT 0 AFTER notes'):
+            backfill_sale_item_counts(cursor)
+        
         # Check if sample data exists
         cursor.execute("SELECT COUNT(*) as count FROM customers")
         customer_count = cursor.fetchone()[0]
@@ -100,10 +158,15 @@ def setup_extended_database():
             print(f"[OK] Inserted {len(customers)} customers")
         
         connection.commit()
+        
+        print("Building daily sales rollups...")
+        days, medicine_days = rebuild_rollups(connection)
+        print(f"[OK] Rollups rebuilt ({days} days, {medicine_days} day/medicine rows)")
+        
         print("\n" + "="*60)
         print("SUCCESS! Extended database setup completed!")
         print("="*60)
-        print("\nTables: customers, sales, sale_items")
+        print("\nTables: customers, sales, sale_items, daily_sales_rollup, daily_medicine_sales_rollup")
         print("You can now use the full CRUD operations.")
         
     except Error as e:
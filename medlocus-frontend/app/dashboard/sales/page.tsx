@@ -2,7 +2,7 @@
 
 import { useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { fetchSales, fetchSale, createSale, updateSale, deleteSale, fetchCustomers, fetchMedicines } from '@/src/services/api';
+import { fetchSales, fetchSale, createSale, updateSale, deleteSale, fetchCustomers, fetchMedicines, newIdempotencyKey } from '@/src/services/api';
 import { Table } from '@/src/components/ui/Table';
 import { Button } from '@/src/components/ui/Button';
 import { Modal } from '@/src/components/ui/Modal';
@@ -16,6 +16,10 @@ export default function SalesPage() {
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [editingSale, setEditingSale] = useState<any>(null);
   const [page, setPage] = useState(1);
+  // Idempotency key of the sale being entered: kept across resubmits (also
+  // after closing and reopening the dialog) until a sale is booked, so a retry
+  // after a lost response cannot book it twice
+  const [saleKey, setSaleKey] = useState(newIdempotencyKey);
   const queryClient = useQueryClient();
 
   const { data: salesData, isLoading } = useQuery({
@@ -34,10 +38,11 @@ export default function SalesPage() {
   });
 
   const createMutation = useMutation({
-    mutationFn: createSale,
+    mutationFn: (data: Parameters<typeof createSale>[0]) => createSale(data, saleKey),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['sales'] });
       queryClient.invalidateQueries({ queryKey: ['medicines'] });
+      setSaleKey(newIdempotencyKey());
       setIsModalOpen(false);
       resetForm();
     },
@@ -3,10 +3,14 @@
 import { useEffect, useRef, useState } from 'react';
 import { useQueryClient } from '@tanstack/react-query';
 import { createMockSocket } from '@/src/mocks/socket';
+import { createWebSocketSocket } from '@/src/services/realtime';
 import type { KPI } from '@/src/services/api/types';
 
 type EventType = 'kpi_update' | 'notification';
 
+// Origin of the asgi.py backend for the push WebSocket, e.g. http://localhost:5000
+const REALTIME_URL = process.env.NEXT_PUBLIC_REALTIME_URL;
+
 interface RealtimeEvent {
   type: EventType;
   payload: unknown;
@@ -14,12 +18,16 @@ interface RealtimeEvent {
 
 export function useRealtime(namespace: string = '/ws/notifications') {
   const [isConnected, setIsConnected] = useState(false);
-  const socketRef = useRef<ReturnType<typeof createMockSocket> | null>(null);
+  const socketRef = useRef<
+    ReturnType<typeof createMockSocket> | ReturnType<typeof createWebSocketSocket> | null
+  >(null);
   const queryClient = useQueryClient();
 
   useEffect(() => {
-    // Use mock socket in development
-    const socket = createMockSocket(namespace);
+    // Use the backend's WebSocket when configured, the mock socket otherwise
+    const socket = REALTIME_URL
+      ? createWebSocketSocket(`${REALTIME_URL}${namespace}`)
+      : createMockSocket(namespace);
     socketRef.current = socket;
 
     const handleConnect = () => {
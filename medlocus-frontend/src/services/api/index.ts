@@ -96,8 +96,24 @@ export const fetchSale = async (id: number): Promise<Sale> => {
   return apiClient.get<Sale>(`/sales/${id}`);
 };
 
-export const createSale = async (data: Partial<Sale> & {items: SaleItem[]}): Promise<Sale> => {
-  return apiClient.post<Sale>('/sales', data);
+// One key per sale submission (create it when the form opens, not per request)
+export const newIdempotencyKey = (): string => {
+  // crypto.randomUUID only exists on secure (https/localhost) origins;
+  // getRandomValues works on plain-http LAN deployments too
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+// Pass the same idempotencyKey when retrying a submission: the backend then
+// returns the sale it already booked instead of booking (and destocking) twice
+export const createSale = async (
+  data: Partial<Sale> & {items: SaleItem[]},
+  idempotencyKey: string
+): Promise<Sale> => {
+  return apiClient.post<Sale>('/sales', data, { 'Idempotency-Key': idempotencyKey });
 };
 
 export const updateSale = async (id: number, data: Partial<Sale>): Promise<Sale> => {
@@ -0,0 +1,96 @@
+// WebSocket connection to the backend's /ws/notifications route (served by
+// asgi.py, where an open connection holds no server thread), exposing the
+// same on/off/connect/disconnect interface as the mock socket so
+// useRealtime can use either
+
+type EventCallback = (data: unknown) => void;
+
+const EVENT_TYPES = ['kpi_update', 'notification'];
+
+// Wait before reconnecting after the connection drops
+const RECONNECT_DELAY_MS = 3000;
+
+class WebSocketSocket {
+  private listeners: Map<string, EventCallback[]> = new Map();
+  private socket: WebSocket | null = null;
+  private lastEventId: number | null = null;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  private closed = false;
+
+  constructor(private url: string) {}
+
+  connect() {
+    this.closed = false;
+    // Resume after the last event seen, so nothing is missed across reconnects
+    const url = this.lastEventId === null ? this.url : `${this.url}?last_event_id=${this.lastEventId}`;
+    this.socket = new WebSocket(url);
+    this.socket.onopen = () => this.emit('connect', {});
+    this.socket.onclose = () => {
+      this.emit('disconnect', {});
+      if (!this.closed) {
+        this.reconnectTimer = setTimeout(() => this.connect(), RECONNECT_DELAY_MS);
+      }
+    };
+    this.socket.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      // Ids can arrive slightly out of order (see EventFeed); resume after the highest
+      if (typeof event.id === 'number' && (this.lastEventId === null || event.id > this.lastEventId)) {
+        this.lastEventId = event.id;
+      }
+      if (EVENT_TYPES.includes(event.type)) {
+        this.emit(event.type, event.payload);
+      }
+    };
+  }
+
+  disconnect() {
+    this.closed = true;
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
+    }
+    this.socket?.close();
+    this.socket = null;
+  }
+
+  on(event: string, callback: EventCallback) {
+    if (!this.listeners.has(event)) {
+      this.listeners.set(event, []);
+    }
+    this.listeners.get(event)!.push(callback);
+  }
+
+  off(event: string, callback?: EventCallback) {
+    if (!this.listeners.has(event)) return;
+
+    if (callback) {
+      const callbacks = this.listeners.get(event)!;
+      const index = callbacks.indexOf(callback);
+      if (index > -1) {
+        callbacks.splice(index, 1);
+      }
+    } else {
+      this.listeners.delete(event);
+    }
+  }
+
+  private emit(event: string, data: unknown) {
+    const callbacks = this.listeners.get(event) || [];
+    callbacks.forEach((callback) => {
+      try {
+        callback(data);
+      } catch (error) {
+        console.error(`[Realtime] Error in callback for ${event}:`, error);
+      }
+    });
+  }
+
+  get connected() {
+    return this.socket?.readyState === WebSocket.OPEN;
+  }
+}
+
+// url may be given as the backend's http(s) origin plus path
+export function createWebSocketSocket(url: string) {
+  return new WebSocketSocket(url.replace(/^http/, 'ws'));
+}